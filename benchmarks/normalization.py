@@ -0,0 +1,107 @@
+import click
+import json
+import random
+import re
+import sys
+import timeit
+from pathlib import Path
+from typing import Callable, Final
+
+sys.path.insert(0, str(Path(__file__).absolute().parent.parent))
+
+from transcripers.normalization import PROFILES, Normalizer  # noqa: E402
+
+
+WORDS: Final[list[str]] = [
+    "بِسْمِ",
+    "ٱللَّهِ",
+    "ٱلرَّحْمَٰنِ",
+    "ٱلرَّحِيمِ",
+    "قَدْ",
+    "سَمِعَ",
+    "تُجَٰدِلُكَ",
+    "وَتَشْتَكِىٓ",
+    "إِلَى",
+    "تَحَاوُرَكُمَآ",
+    "سَمِيعٌۢ",
+    "بَصِيرٌ",
+    "ۚ",
+]
+
+
+# what utils.remove_diacritics did before the translate tables
+def remove_diacritics_re(text: str) -> str:
+    text = re.sub(r"[ًٌٍَُِّْ]", "", text)
+    return text
+
+
+def make_texts(count: int, words_per_text: int, seed: int) -> list[str]:
+    rng = random.Random(seed)
+    return [
+        " ".join(rng.choice(WORDS) for _ in range(words_per_text)) for _ in range(count)
+    ]
+
+
+def time_it(fn: Callable[[], object], repeat: int) -> float:
+    return min(timeit.repeat(fn, number=1, repeat=repeat))
+
+
+@click.command(help="compare the normalization profiles against the old re.sub remove_diacritics")
+@click.option("--texts", default=10000, type=click.IntRange(min=1))
+@click.option("--words-per-text", default=20, type=click.IntRange(min=1))
+@click.option("--repeat", default=5, type=click.IntRange(min=1))
+@click.option("--seed", default=0, type=int)
+@click.option("-o", type=click.Path(dir_okay=False), help="write the results as JSON")
+def main(texts: int, words_per_text: int, repeat: int, seed: int, o: str | None):
+    samples = make_texts(texts, words_per_text, seed)
+
+    harakat = Normalizer("harakat")
+    assert harakat.normalize_batch(samples) == list(map(remove_diacritics_re, samples))
+
+    results: dict[str, float] = {
+        "re.sub": time_it(lambda: [remove_diacritics_re(text) for text in samples], repeat),
+        # the old pipeline normalized every prediction twice (count + strip)
+        "re.sub x2": time_it(
+            lambda: [
+                remove_diacritics_re(text) != text and remove_diacritics_re(text)
+                for text in samples
+            ],
+            repeat,
+        ),
+    }
+    for profile in PROFILES:
+        normalizer = Normalizer(profile)
+        assert normalizer.normalize_batch(samples) == [
+            " ".join(text.translate(PROFILES[profile]).split())
+            if normalizer.collapse_spaces
+            else text.translate(PROFILES[profile])
+            for text in samples
+        ]
+        results[f"{profile} per text"] = time_it(
+            lambda: [normalizer(text) for text in samples], repeat
+        )
+        results[f"{profile} batch"] = time_it(
+            lambda: normalizer.normalize_batch(samples), repeat
+        )
+
+    baseline = results["re.sub"]
+    for name, seconds in results.items():
+        print(
+            f"{name}: {seconds * 1000:.2f}ms, {texts / seconds:.0f} texts/s, {baseline / seconds:.1f}x"
+        )
+
+    if o is not None:
+        with open(o, "w", encoding="utf-8") as file:
+            json.dump(
+                {
+                    "texts": texts,
+                    "words_per_text": words_per_text,
+                    "seconds": results,
+                },
+                file,
+                indent=2,
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+import click
+import json
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Final
+
+
+ROOT: Final[Path] = Path(__file__).absolute().parent.parent
+
+# none of these may be imported before a model constructor is actually used
+HEAVY_MODULES: Final[list[str]] = [
+    "torch",
+    "torchaudio",
+    "whisper",
+    "transformers",
+    "requests",
+]
+
+COMMANDS: Final[dict[str, list[str]]] = {
+    "help": ["main.py", "--help"],
+    "generate --help": ["main.py", "generate", "--help"],
+    "validation error": [
+        "main.py",
+        "generate",
+        "--sorah-range",
+        "0:115",
+        "AyatTranscriper",
+        "main.py",
+        ".",
+    ],
+}
+
+
+def time_command(args: list[str], repeat: int) -> list[float]:
+    timings = []
+    for _ in range(repeat):
+        time_start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, *args],
+            cwd=ROOT,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        timings.append(time.perf_counter() - time_start)
+    return timings
+
+
+def imported_heavy_modules() -> list[str]:
+    # importing the CLI and the transcripers package alone must stay light
+    code = (
+        "import sys, main, transcripers; "
+        f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout.strip()
+    return [module for module in output.split(",") if module]
+
+
+@click.command(help="measure the CLI startup time and check no backend is imported eagerly")
+@click.option("--repeat", default=5, type=click.IntRange(min=1))
+@click.option(
+    "--max-seconds",
+    default=1.0,
+    type=float,
+    help="fail when the median startup time of any command exceeds this",
+)
+@click.option("-o", type=click.Path(dir_okay=False), help="write the results as JSON")
+def main(repeat: int, max_seconds: float, o: str | None):
+    results: dict[str, dict[str, float]] = {}
+    failed = False
+
+    for name, args in COMMANDS.items():
+        timings = time_command(args, repeat)
+        results[name] = {
+            "min_s": min(timings),
+            "median_s": statistics.median(timings),
+        }
+        print(f"{name}: min {min(timings):.3f}s, median {statistics.median(timings):.3f}s")
+        if statistics.median(timings) > max_seconds:
+            print(f"  slower than {max_seconds}s", file=sys.stderr)
+            failed = True
+
+    heavy = imported_heavy_modules()
+    if len(heavy) > 0:
+        print(f"eagerly imported: {', '.join(heavy)}", file=sys.stderr)
+        failed = True
+
+    if o is not None:
+        with open(o, "w", encoding="utf-8") as file:
+            json.dump({"commands": results, "eager_imports": heavy}, file, indent=2)
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
 import click
 from typing import Final
-import requests  # type: ignore
+from pathlib import Path
+import os
 
 
 class SorahRange(click.ParamType):
@@ -35,6 +36,27 @@ class SorahRange(click.ParamType):
 SORAH_RANGE = SorahRange()
 
 
+class Temperatures(click.ParamType):
+    name = "t1,t2,... (ex: 0,0.2,0.4)"
+
+    def convert(self, value, param, ctx):
+        if isinstance(value, tuple):
+            return value
+
+        try:
+            temperatures = tuple(float(part) for part in value.split(","))
+        except ValueError:
+            self.fail(f"{value} is not a comma separated list of temperatures")
+
+        if any(temperature < 0 for temperature in temperatures):
+            self.fail(f"temperatures must be >= 0: {value}")
+
+        return temperatures
+
+
+TEMPERATURES = Temperatures()
+
+
 class WhisperModelChoice(click.ParamType):
     name = "whisper-model-choice"
 
@@ -50,10 +72,14 @@ class WhisperModelChoice(click.ParamType):
     }
 
     def convert(self, value: str, param, ctx):
-        if (
-            value in WhisperModelChoice.Models
-            or requests.get(f"https://huggingface.co/{value}").status_code == 200
-        ):
+        if value in WhisperModelChoice.Models:
+            return value
+
+        path = Path(value)
+        if path.is_file() or (path.is_dir() and (path / "config.json").is_file()):
+            return value
+
+        if _in_hf_cache(value) or _on_hf_hub(value):
             return value
 
         return click.Path(exists=True, dir_okay=False).convert(value, param, ctx)
@@ -63,3 +89,44 @@ class WhisperModelChoice(click.ParamType):
 
 
 WHSIPER_MODEL_CHOICE = WhisperModelChoice()
+
+
+def _hf_hub_cache() -> Path:
+    for variable in ("HF_HUB_CACHE", "HUGGINGFACE_HUB_CACHE"):
+        if variable in os.environ:
+            return Path(os.environ[variable])
+
+    hf_home = os.environ.get(
+        "HF_HOME",
+        Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache")) / "huggingface",
+    )
+    return Path(hf_home) / "hub"
+
+
+def _in_hf_cache(model_id: str) -> bool:
+    snapshots = _hf_hub_cache() / f"models--{model_id.replace('/', '--')}" / "snapshots"
+    return snapshots.is_dir() and any(snapshots.iterdir())
+
+
+def _hf_offline() -> bool:
+    return any(
+        os.environ.get(variable, "").lower() in ("1", "true", "yes", "on")
+        for variable in ("HF_HUB_OFFLINE", "TRANSFORMERS_OFFLINE")
+    )
+
+
+def _on_hf_hub(model_id: str) -> bool:
+    # air-gapped nodes set HF_HUB_OFFLINE, everywhere else a short timeout keeps
+    # an unreachable hub from hanging the CLI
+    if _hf_offline():
+        return False
+
+    import requests  # type: ignore
+
+    try:
+        response = requests.head(
+            f"https://huggingface.co/{model_id}", timeout=5, allow_redirects=True
+        )
+        return response.status_code == 200
+    except requests.RequestException:
+        return False
@@ -1,8 +1,16 @@
 import click
-from clicktypes import SORAH_RANGE, WHSIPER_MODEL_CHOICE
+import os
+from functools import partial
+from pathlib import Path
+from clicktypes import SORAH_RANGE, TEMPERATURES, WHSIPER_MODEL_CHOICE
 
 
-@click.command(help="transcribe sorahs in the given range + the WER")
+@click.group()
+def cli():
+    pass
+
+
+@cli.command(help="transcribe sorahs in the given range + the WER")
 @click.argument(
     "transcriber",
     type=click.Choice(["QuranComTranscriper", "AyatTranscriper"], case_sensitive=False),
@@ -15,9 +23,16 @@ from clicktypes import SORAH_RANGE, WHSIPER_MODEL_CHOICE
 )
 @click.option(
     "--model",
-    default="medium",
+    default=["medium"],
+    multiple=True,
     type=WHSIPER_MODEL_CHOICE,
-    help="multilingual model used for transcribing (default: medium)",
+    help="multilingual model used for transcribing (default: medium), repeat it to compare several models on the same decoded audio",
+)
+@click.option(
+    "--model-workers",
+    default=1,
+    type=click.IntRange(min=1),
+    help="number of models evaluated in parallel processes when --model is repeated (1 runs them one after another)",
 )
 @click.option(
     "--model-constructor",
@@ -33,7 +48,177 @@ from clicktypes import SORAH_RANGE, WHSIPER_MODEL_CHOICE
     type=bool,
     help="whether to normalize the output text of the model before calculating WER or not",
 )
+@click.option(
+    "--normalization",
+    default="harakat",
+    type=click.Choice(["harakat", "tatweel", "letters", "quranic"], case_sensitive=False),
+    help="what --normalize-text removes from both predictions and references, each profile includes the previous ones: harakat, tatweel, alef/hamza/ya/ta-marbuta unification, Quranic annotation marks (default: harakat)",
+)
 @click.option("--sorah-range", default="1:114", type=SORAH_RANGE)
+@click.option(
+    "--sorah-audio",
+    is_flag=True,
+    default=False,
+    help="AUDIO_PATH holds one recording per sorah (001.mp3), decoded once and cut into parts by from_ms/to_ms (QuranComTranscriper)",
+)
+@click.option(
+    "--long-form",
+    is_flag=True,
+    default=False,
+    help="transcribe every sorah recording (001.mp3) in one long-form pass with word timestamps and split the words into parts by the metadata timings (QuranComTranscriper)",
+)
+@click.option(
+    "--batch-size",
+    default=1,
+    type=click.IntRange(min=1),
+    help="number of parts transcribed together in one model call",
+)
+@click.option(
+    "--schedule",
+    default="ordered",
+    type=click.Choice(["ordered", "bucketed"], case_sensitive=False),
+    help="ordered transcribes the parts in sorah/part order, bucketed sorts them by duration first so every --batch-size batch holds parts of about the same length (the output keeps sorah/part order) (default: ordered)",
+)
+@click.option(
+    "--short-form",
+    is_flag=True,
+    default=False,
+    help="decode clips that fit in one 30s window with batched whisper.decode instead of transcribe() (OpenAIWhisperModel)",
+)
+@click.option(
+    "--precision",
+    default="fp32",
+    type=click.Choice(["fp32", "bf16", "int8"], case_sensitive=False),
+    help="fp32 weights, bf16 autocast (falls back to fp32 when the device lacks bf16) or int8 dynamic quantization of the linear layers (cpu only)",
+)
+@click.option(
+    "--draft-model",
+    type=WHSIPER_MODEL_CHOICE,
+    help="small checkpoint with the same tokenizer (e.g. tiny or a distilled one) drafting tokens for assisted generation, the output stays that of greedy decoding with --model (TransformersWhisperModel)",
+)
+@click.option(
+    "--beam-size",
+    type=click.IntRange(min=1),
+    help="beam search width at temperature 0 (default: greedy decoding)",
+)
+@click.option(
+    "--temperatures",
+    type=TEMPERATURES,
+    help="temperatures tried in order while the output fails the thresholds (default: 0,0.2,0.4,0.6,0.8,1.0 for OpenAIWhisperModel, a single greedy pass for TransformersWhisperModel)",
+)
+@click.option(
+    "--compression-ratio-threshold",
+    type=float,
+    help="outputs that gzip better than this are treated as repetition loops and decoded again (default: 2.4)",
+)
+@click.option(
+    "--logprob-threshold",
+    type=float,
+    help="outputs with a lower average log probability are decoded again (default: -1.0)",
+)
+@click.option(
+    "--no-speech-threshold",
+    type=float,
+    help="windows with a higher no-speech probability are kept as silence instead of decoded again (default: 0.6)",
+)
+@click.option(
+    "--decode-policy",
+    default="fallback",
+    type=click.Choice(["fallback", "greedy-first"], case_sensitive=False),
+    help="fallback uses --beam-size from the first attempt, greedy-first decodes greedily and only falls back to --beam-size and the temperatures when the output fails the thresholds (default: fallback)",
+)
+@click.option(
+    "--trim-silence",
+    default="none",
+    type=click.Choice(["none", "energy", "timings"], case_sensitive=False),
+    help="cut leading/trailing silence before inference: energy finds it from the frame energy, timings uses the first/last word timings of the metadata (QuranComTranscriper, energy otherwise) (default: none)",
+)
+@click.option(
+    "--trim-threshold-db",
+    default=-40.0,
+    type=click.FloatRange(max=0),
+    help="frames quieter than this many dB below the loudest frame of the part count as silence (default: -40)",
+)
+@click.option(
+    "--trim-padding-ms",
+    default=200.0,
+    type=click.FloatRange(min=0),
+    help="audio kept before the first and after the last voiced frame or word (default: 200)",
+)
+@click.option(
+    "--prefetch",
+    default=4,
+    type=click.IntRange(min=0),
+    help="number of audio files decoded ahead in the background while the model runs (0 disables prefetching)",
+)
+@click.option(
+    "--prefetch-workers",
+    default=2,
+    type=click.IntRange(min=1),
+    help="number of threads decoding audio for the prefetch queue",
+)
+@click.option(
+    "--cache-dir",
+    type=click.Path(file_okay=False),
+    help="directory of the persistent transcription cache (default: $XDG_CACHE_HOME/whisper-quran-cli)",
+)
+@click.option(
+    "--no-cache",
+    is_flag=True,
+    default=False,
+    help="transcribe every part again without reading or writing the cache",
+)
+@click.option(
+    "--cache-size",
+    default=1024,
+    type=click.IntRange(min=1),
+    help="maximum size of the cached transcriptions in MiB (least recently used entries are evicted)",
+)
+@click.option(
+    "--no-weights-cache",
+    is_flag=True,
+    default=False,
+    help="load checkpoint files with torch.load every time instead of converting them once into <cache-dir>/weights and memory-mapping them (OpenAIWhisperModel)",
+)
+@click.option(
+    "--resume",
+    is_flag=True,
+    default=False,
+    help="continue from the <output-filename>.jsonl journal of an interrupted run, skipping parts already transcribed (refused when the journal was written with another model, normalization, decoding or trimming setting)",
+)
+@click.option(
+    "--workers",
+    default=1,
+    type=click.IntRange(min=1),
+    help="number of worker processes, each loading its own model and transcribing a share of the parts balanced by audio duration",
+)
+@click.option(
+    "--torch-threads",
+    type=click.IntRange(min=1),
+    help="number of torch threads per process (default: cpu count / workers when --workers > 1)",
+)
+@click.option(
+    "--scoring-workers",
+    default=1,
+    type=click.IntRange(min=0),
+    help="number of threads aligning predictions with references while the model runs (0 scores inline after every batch)",
+)
+@click.option(
+    "--scoring-processes",
+    is_flag=True,
+    default=False,
+    help="score in --scoring-workers processes instead of threads, for long parts where the alignment is CPU bound",
+)
+@click.option(
+    "--server",
+    type=str,
+    help="send the audio to a running `main.py serve` (unix socket path or host:port) instead of loading the model in this process",
+)
+@click.option(
+    "--progress/--no-progress",
+    default=True,
+    help="show a progress bar with the running WER and real-time factor",
+)
 @click.option(
     "--device",
     "-d",
@@ -55,31 +240,514 @@ def generate(
     transcriber: str,
     audio_path: str,
     metadata_path: str,
-    model: str,
+    model: tuple[str, ...],
+    model_workers: int,
     model_constructor: str,
     normalize_text: bool,
+    normalization: str,
     sorah_range: tuple[int, int],
+    sorah_audio: bool,
+    long_form: bool,
+    batch_size: int,
+    schedule: str,
+    short_form: bool,
+    precision: str,
+    draft_model: str | None,
+    beam_size: int | None,
+    temperatures: tuple[float, ...] | None,
+    compression_ratio_threshold: float | None,
+    logprob_threshold: float | None,
+    no_speech_threshold: float | None,
+    decode_policy: str,
+    trim_silence: str,
+    trim_threshold_db: float,
+    trim_padding_ms: float,
+    prefetch: int,
+    prefetch_workers: int,
+    cache_dir: str | None,
+    no_cache: bool,
+    cache_size: int,
+    no_weights_cache: bool,
+    resume: bool,
+    workers: int,
+    torch_threads: int | None,
+    scoring_workers: int,
+    scoring_processes: bool,
+    server: str | None,
+    progress: bool,
     device: str,
     o: str,
     output_filename: str,
 ):
     from transcripers import mapping, constructor_mapping
+    from transcripers.base_transcriper import TranscribeOptions
+    from transcripers.cache import DEFAULT_CACHE_DIR
+    from transcripers.journal import JournalMismatchError
+    from transcripers.transcribe import DecodeOptions
+
+    if cache_dir is None:
+        cache_dir = str(DEFAULT_CACHE_DIR)
 
     cls = mapping[transcriber]
-    model_constructor_obj = constructor_mapping[model_constructor]()
+    if server is not None:
+        from transcripers.server import RemoteModel
+
+        # the served model was loaded with its own settings, these would be
+        # silently ignored (and recorded in the journal as if they applied)
+        context = click.get_current_context()
+        ignored = [
+            f"--{name.replace('_', '-')}"
+            for name in (
+                "model",
+                "model_constructor",
+                "short_form",
+                "precision",
+                "draft_model",
+                "beam_size",
+                "temperatures",
+                "compression_ratio_threshold",
+                "logprob_threshold",
+                "no_speech_threshold",
+                "decode_policy",
+                "no_weights_cache",
+                "device",
+            )
+            if context.get_parameter_source(name) != click.core.ParameterSource.DEFAULT
+        ]
+        if len(ignored) > 0:
+            raise click.UsageError(
+                f"{', '.join(ignored)} cannot be used with --server, the served model keeps the settings `main.py serve` loaded it with"
+            )
+        model_constructor_obj = RemoteModel(server)
+    else:
+        model_constructor_obj = constructor_mapping[model_constructor]()
+
+    transcriber_options = {}
+    if sorah_audio:
+        if transcriber != "QuranComTranscriper":
+            raise click.UsageError(
+                "--sorah-audio needs part timings, only QuranComTranscriper has them"
+            )
+        transcriber_options["sorah_audio"] = True
+    if long_form:
+        if transcriber != "QuranComTranscriper":
+            raise click.UsageError(
+                "--long-form needs part timings, only QuranComTranscriper has them"
+            )
+        if trim_silence != "none":
+            raise click.UsageError(
+                "--trim-silence would shift the word timestamps of --long-form"
+            )
+        transcriber_options["long_form"] = True
 
-    obj = cls(metadata_path=metadata_path, audio_path=audio_path)
-    obj(
-        model_id=model,
-        model_constructor=model_constructor_obj,
+    if draft_model is not None:
+        from transcripers.transcribe import check_draft_compatibility
+
+        if model_constructor != "TransformersWhisperModel":
+            raise click.UsageError(
+                "--draft-model needs --model-constructor TransformersWhisperModel in this process"
+            )
+        if beam_size is not None or (
+            temperatures is not None and any(temperature > 0 for temperature in temperatures)
+        ):
+            raise click.UsageError(
+                "--draft-model keeps the output identical only for greedy decoding, drop --beam-size and the temperatures above 0"
+            )
+        # checked here so an incompatible pair fails before any audio is decoded
+        for model_id in model:
+            try:
+                check_draft_compatibility(model_id, draft_model)
+            except ValueError as e:
+                raise click.UsageError(str(e))
+
+    obj = cls(metadata_path=metadata_path, audio_path=audio_path, **transcriber_options)
+    if len(model) > 1:
+        # one output per model plus <output-filename>_comparison.csv
+        run = partial(obj.compare, model_ids=list(model), model_workers=model_workers)
+    else:
+        run = partial(obj, model_id=model[0])
+
+    options = TranscribeOptions(
         normalize_text=normalize_text,
+        normalization=normalization,
         from_sorah=sorah_range[0],
         to_sorah=sorah_range[1],
         device=device,
-        output_dir=o,
-        output_filename=output_filename,
+        batch_size=batch_size,
+        schedule=schedule,
+        short_form=short_form,
+        precision=precision,
+        decode_options=DecodeOptions(
+            beam_size=beam_size,
+            temperatures=temperatures,
+            compression_ratio_threshold=compression_ratio_threshold,
+            logprob_threshold=logprob_threshold,
+            no_speech_threshold=no_speech_threshold,
+            policy=decode_policy,
+        ),
+        draft_model=draft_model,
+        trim_silence=trim_silence,
+        trim_threshold_db=trim_threshold_db,
+        trim_padding_ms=trim_padding_ms,
+        prefetch=prefetch,
+        prefetch_workers=prefetch_workers,
+        cache_dir=None if no_cache else cache_dir,
+        weights_cache=None if no_weights_cache else str(Path(cache_dir) / "weights"),
+        cache_size_mb=cache_size,
+        resume=resume,
+        workers=workers,
+        torch_threads=torch_threads,
+        scoring_workers=scoring_workers,
+        scoring_processes=scoring_processes,
+        progress=progress,
     )
 
+    try:
+        run(
+            model_constructor=model_constructor_obj,
+            options=options,
+            output_dir=o,
+            output_filename=output_filename,
+        )
+    except JournalMismatchError as e:
+        raise click.UsageError(str(e))
+
+
+@cli.command(help="recompute the WER of earlier result files from their stored predictions, without running the model")
+@click.argument(
+    "results",
+    nargs=-1,
+    required=True,
+    type=click.Path(file_okay=True, dir_okay=False, exists=True),
+)
+@click.option(
+    "--normalization",
+    default="harakat",
+    type=click.Choice(
+        ["none", "harakat", "tatweel", "letters", "quranic"], case_sensitive=False
+    ),
+    help="profile applied to the stored predictions and references before scoring (default: harakat)",
+)
+@click.option(
+    "--transcriber",
+    type=click.Choice(["QuranComTranscriper", "AyatTranscriper"], case_sensitive=False),
+    help="read updated references from --metadata-path with this transcriber instead of the ones stored in the results",
+)
+@click.option(
+    "--metadata-path",
+    type=click.Path(file_okay=True, dir_okay=False, exists=True),
+    help="metadata file the updated references are read from (needs --transcriber)",
+)
+@click.option(
+    "--workers",
+    default=os.cpu_count() or 1,
+    type=click.IntRange(min=0),
+    help="number of processes the alignments run in (0 scores in this process, default: number of cpus)",
+)
+@click.option(
+    "-o",
+    default=".",
+    type=click.Path(file_okay=False, exists=True),
+    help="output directory (default: .)",
+)
+@click.option(
+    "--suffix",
+    default="rescored",
+    type=str,
+    help="<result>.<suffix>.json and <result>.<suffix>_errors.json (parts that cannot be scored) are written for every result file (default: rescored)",
+)
+def rescore(
+    results: tuple[str, ...],
+    normalization: str,
+    transcriber: str | None,
+    metadata_path: str | None,
+    workers: int,
+    o: str,
+    suffix: str,
+):
+    import json
+    from pydantic import RootModel
+    from transcripers import mapping
+    from transcripers.output_types import OutputSorahErrorsEntry, TotalEntry
+    from transcripers.rescore import load_result, rescore as rescore_result
+
+    if (transcriber is None) != (metadata_path is None):
+        raise click.UsageError("--transcriber and --metadata-path go together")
+
+    references = None
+    if transcriber is not None:
+        # only the metadata is read, the audio path is never used
+        references = mapping[transcriber](
+            metadata_path=metadata_path, audio_path="."  # type: ignore
+        ).load_references()
+
+    for result_path in map(Path, results):
+        total_entry, sorahs_errors, total_count, with_diacritics_count = rescore_result(
+            load_result(result_path), normalization, references, workers
+        )
+        output_path = Path(o) / f"{result_path.stem}.{suffix}.json"
+        with open(output_path, "w", encoding="utf-8") as file:
+            json.dump(
+                RootModel[TotalEntry](total_entry).model_dump(),
+                file,
+                ensure_ascii=False,
+            )
+        with open(
+            Path(o) / f"{result_path.stem}.{suffix}_errors.json", "w", encoding="utf-8"
+        ) as file:
+            json.dump(
+                [
+                    RootModel[OutputSorahErrorsEntry](sorah_errors).model_dump()
+                    for sorah_errors in sorahs_errors
+                ],
+                file,
+                ensure_ascii=False,
+            )
+
+        wer = total_entry.totals.wer
+        print(f"{result_path} -> {output_path}")
+        print(f"WER: {'-' if wer is None else f'{wer * 100:.2f}%'}")
+        print(f"Total count: {total_count}")
+        print(f"With diacritics count: {with_diacritics_count}")
+        if total_count > 0:
+            print(
+                f"Percentage of with diacritics to total count: {with_diacritics_count / total_count * 100}%"
+            )
+
+
+@cli.command(
+    "prepare-audio",
+    help="decode AUDIO_PATH once into a 16kHz PCM store usable as the AUDIO_PATH of generate",
+)
+@click.argument(
+    "audio-path", type=click.Path(file_okay=False, exists=True, executable=True)
+)
+@click.argument("store-path", type=click.Path(file_okay=False))
+@click.option(
+    "--workers",
+    default=4,
+    type=click.IntRange(min=1),
+    help="number of files decoded in parallel",
+)
+def prepare_audio(audio_path: str, store_path: str, workers: int):
+    from transcripers.audio import prepare_audio_store, load_audio_ffmpeg
+
+    count = prepare_audio_store(
+        audio_path, store_path, load=load_audio_ffmpeg, workers=workers
+    )
+    print(f"Stored {count} files in {store_path}")
+
+
+@cli.command(
+    help="load a model once and transcribe the audio sent by `generate --server` in micro-batches"
+)
+@click.argument("address", type=str)
+@click.option(
+    "--model",
+    default="medium",
+    type=WHSIPER_MODEL_CHOICE,
+    help="multilingual model used for transcribing (default: medium)",
+)
+@click.option(
+    "--model-constructor",
+    default="OpenAIWhisperModel",
+    type=click.Choice(
+        ["OpenAIWhisperModel", "TransformersWhisperModel"], case_sensitive=False
+    ),
+    help="model variant to use (openai-whisper or transformers)",
+)
+@click.option("--device", "-d", default="cuda", type=str)
+@click.option(
+    "--short-form",
+    is_flag=True,
+    default=False,
+    help="decode clips that fit in one 30s window with batched whisper.decode instead of transcribe() (OpenAIWhisperModel)",
+)
+@click.option(
+    "--precision",
+    default="fp32",
+    type=click.Choice(["fp32", "bf16", "int8"], case_sensitive=False),
+)
+@click.option(
+    "--word-timestamps",
+    is_flag=True,
+    default=False,
+    help="return word timestamps with every prediction, needed by clients running generate --long-form",
+)
+@click.option(
+    "--max-batch-size",
+    default=16,
+    type=click.IntRange(min=1),
+    help="largest number of requests transcribed in one model call",
+)
+@click.option(
+    "--max-wait-ms",
+    default=20.0,
+    type=click.FloatRange(min=0),
+    help="how long the first request of a batch waits for others to join it",
+)
+@click.option(
+    "--stats-interval",
+    default=60.0,
+    type=click.FloatRange(min=0),
+    help="seconds between queue depth/batch size/latency reports (0 disables them)",
+)
+def serve(
+    address: str,
+    model: str,
+    model_constructor: str,
+    device: str,
+    short_form: bool,
+    precision: str,
+    word_timestamps: bool,
+    max_batch_size: int,
+    max_wait_ms: float,
+    stats_interval: float,
+):
+    import asyncio
+    from transcripers import constructor_mapping
+    from transcripers.cache import DEFAULT_CACHE_DIR
+    from transcripers.server import BatchingServer
+
+    model_obj = constructor_mapping[model_constructor]().construct_model(
+        model,
+        device=device,
+        batch_size=max_batch_size,
+        short_form=short_form,
+        precision=precision,
+        weights_cache=str(DEFAULT_CACHE_DIR / "weights"),
+        word_timestamps=word_timestamps,
+    )
+    server = BatchingServer(model_obj, max_batch_size, max_wait_ms)
+    try:
+        asyncio.run(server.serve(address, stats_interval_s=stats_interval))
+    except KeyboardInterrupt:
+        pass
+
+
+@cli.command("serve-stats", help="print the queue, batch size and latency metrics of a running server")
+@click.argument("address", type=str)
+def serve_stats(address: str):
+    import json
+    from transcripers.server import RemoteModel
+
+    client = RemoteModel(address)
+    client.construct_model("")
+    print(json.dumps(client.stats(), indent=2))
+    client.close()
+
+
+@cli.command(
+    "convert-model",
+    help="convert an openai-whisper checkpoint once into the memory-mapped weights cache used by generate and serve",
+)
+@click.argument(
+    "checkpoint", type=click.Path(file_okay=True, dir_okay=False, exists=True)
+)
+@click.option(
+    "--cache-dir",
+    type=click.Path(file_okay=False),
+    help="directory of the persistent caches (default: $XDG_CACHE_HOME/whisper-quran-cli)",
+)
+def convert_model(checkpoint: str, cache_dir: str | None):
+    import time
+    from transcripers.cache import DEFAULT_CACHE_DIR
+    from transcripers.weights import WeightsCache, load_whisper_checkpoint
+
+    weights_dir = Path(cache_dir or DEFAULT_CACHE_DIR) / "weights"
+    _, load_source = load_whisper_checkpoint(checkpoint, "cpu", weights_dir)
+
+    # the load from the converted cache is what every later run pays
+    time_start = time.perf_counter()
+    weights = WeightsCache(weights_dir)
+    weights.load(weights.checkpoint_hash(checkpoint), "cpu")
+    print(
+        f"{checkpoint}: {load_source}, loads from {weights_dir} in {time.perf_counter() - time_start:.2f}s"
+    )
+
+
+@cli.command(
+    help="run a transcriber end to end on synthetic audio with a stand-in model and report per-stage timings"
+)
+@click.argument(
+    "transcriber",
+    type=click.Choice(["QuranComTranscriper", "AyatTranscriper"], case_sensitive=False),
+)
+@click.option("--sorah-range", default="58:66", type=SORAH_RANGE)
+@click.option(
+    "--parts-per-sorah",
+    default=10,
+    type=click.IntRange(min=1),
+    help="number of synthetic ayat/parts generated per sorah",
+)
+@click.option("--batch-size", default=1, type=click.IntRange(min=1))
+@click.option(
+    "--schedule",
+    default="ordered",
+    type=click.Choice(["ordered", "bucketed"], case_sensitive=False),
+)
+@click.option("--prefetch", default=4, type=click.IntRange(min=0))
+@click.option("--prefetch-workers", default=2, type=click.IntRange(min=1))
+@click.option(
+    "--audio-store",
+    is_flag=True,
+    default=False,
+    help="read the synthetic audio from a prepare-audio store instead of mp3 files",
+)
+@click.option(
+    "--inference-rtf",
+    default=0.0,
+    type=click.FloatRange(min=0),
+    help="seconds the stand-in model sleeps per second of audio",
+)
+@click.option("--seed", default=0, type=int)
+@click.option(
+    "-o",
+    default="bench.json",
+    type=click.Path(dir_okay=False),
+    help="output file for the results",
+)
+def bench(
+    transcriber: str,
+    sorah_range: tuple[int, int],
+    parts_per_sorah: int,
+    batch_size: int,
+    schedule: str,
+    prefetch: int,
+    prefetch_workers: int,
+    audio_store: bool,
+    inference_rtf: float,
+    seed: int,
+    o: str,
+):
+    import json
+    from transcripers.bench import run_bench
+
+    results = run_bench(
+        transcriber=transcriber,
+        from_sorah=sorah_range[0],
+        to_sorah=sorah_range[1],
+        parts_per_sorah=parts_per_sorah,
+        batch_size=batch_size,
+        schedule=schedule,
+        prefetch=prefetch,
+        prefetch_workers=prefetch_workers,
+        audio_store=audio_store,
+        inference_rtf=inference_rtf,
+        seed=seed,
+    )
+
+    print(
+        f"{results['parts']} parts, {results['audio_s']:.1f}s of audio in {results['wall_time_s']:.2f}s"
+    )
+    for stage, timing in results["stages"].items():
+        print(
+            f"  {stage}: {timing['total_s']:.3f}s, {timing['per_second']:.1f}/s ({timing['count']})"
+        )
+
+    with open(o, "w", encoding="utf-8") as file:
+        json.dump(results, file, ensure_ascii=False, indent=2)
+
 
 if __name__ == "__main__":
-    generate()
+    cli()
@@ -0,0 +1,52 @@
+from transcripers import cache as cache_module
+from transcripers.cache import TranscriptionCache
+from transcripers.weights import WeightsCache
+
+
+def identity(model: str, backend: str = "TransformersWhisperModel") -> dict:
+    return {"backend": backend, "model": model, "options": {}}
+
+
+def test_checkpoint_directory_key_follows_its_files(tmp_path):
+    checkpoint = tmp_path / "checkpoint"
+    checkpoint.mkdir()
+    (checkpoint / "config.json").write_text("{}")
+    (checkpoint / "model.safetensors").write_bytes(b"epoch 1")
+    cache = TranscriptionCache(tmp_path / "cache", max_size_bytes=1 << 20)
+
+    before = cache.model_key(identity(str(checkpoint)))
+    assert cache.model_key(identity(str(checkpoint))) == before
+
+    # retrained into the same directory
+    (checkpoint / "model.safetensors").write_bytes(b"epoch 2, longer")
+    assert cache.model_key(identity(str(checkpoint))) != before
+    cache.close()
+
+
+def test_hub_id_key_follows_the_cached_revision(tmp_path, monkeypatch):
+    revisions = iter(["aaaa", "bbbb"])
+    monkeypatch.setattr(cache_module, "hub_revision", lambda repo_id: next(revisions))
+    cache = TranscriptionCache(tmp_path / "cache", max_size_bytes=1 << 20)
+
+    assert cache.model_key(identity("openai/whisper-medium")) != cache.model_key(
+        identity("openai/whisper-medium")
+    )
+    cache.close()
+
+
+def test_checkpoint_hash_is_memoized_until_the_file_changes(tmp_path, monkeypatch):
+    checkpoint = tmp_path / "medium.pt"
+    checkpoint.write_bytes(b"epoch 1")
+    cache = WeightsCache(tmp_path / "weights")
+    sha256 = cache.checkpoint_hash(checkpoint)
+    assert sha256 == cache_module.file_sha256(checkpoint)
+
+    hashed = []
+    monkeypatch.setattr(
+        cache_module, "file_sha256", lambda path: hashed.append(path) or "new"
+    )
+    assert WeightsCache(tmp_path / "weights").checkpoint_hash(checkpoint) == sha256
+    assert hashed == []
+
+    checkpoint.write_bytes(b"epoch 2, longer")
+    assert cache.checkpoint_hash(checkpoint) == "new"
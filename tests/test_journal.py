@@ -0,0 +1,61 @@
+import pytest
+from transcripers.journal import (
+    Journal,
+    JournalMismatchError,
+    check_journal_header,
+    fold_journal,
+    journal_shard_path,
+    merge_journal_shards,
+    read_journal,
+)
+from transcripers.output_types import OutputPartErrorEntry
+
+
+HEADER = {"model_id": "medium", "normalization": "harakat"}
+
+
+def test_resume_drops_partial_line(tmp_path):
+    path = tmp_path / "run.jsonl"
+    with Journal(path, header=HEADER) as journal:
+        journal.write_error(1, OutputPartErrorEntry(number=1, error_msg="x"))
+    # killed mid-write
+    with open(path, "a", encoding="utf-8") as file:
+        file.write('{"sorah_num": 1, "er')
+
+    with Journal(path, resume=True, header=HEADER) as journal:
+        journal.write_error(1, OutputPartErrorEntry(number=2, error_msg="y"))
+
+    assert [record["error"]["number"] for record in read_journal(path)] == [1, 2]
+
+
+def test_merge_drops_partial_line(tmp_path):
+    path = tmp_path / "run.jsonl"
+    Journal(path, header=HEADER).close()
+    with open(path, "a", encoding="utf-8") as file:
+        file.write('{"sorah_num": 1, "er')
+    with Journal(journal_shard_path(path, 0), resume=True) as journal:
+        journal.write_error(2, OutputPartErrorEntry(number=1, error_msg="x"))
+
+    merge_journal_shards(path)
+
+    assert [record["sorah_num"] for record in read_journal(path)] == [2]
+
+
+def test_resume_with_other_settings_is_refused(tmp_path):
+    path = tmp_path / "run.jsonl"
+    Journal(path, header=HEADER).close()
+
+    check_journal_header(path, dict(HEADER))
+    with pytest.raises(JournalMismatchError, match="normalization"):
+        check_journal_header(path, {**HEADER, "normalization": "quranic"})
+
+
+def test_fold_skips_sorahs_without_records(tmp_path):
+    path = tmp_path / "run.jsonl"
+    with Journal(path, header=HEADER) as journal:
+        journal.write_error(3, OutputPartErrorEntry(number=1, error_msg="x"))
+
+    total_entry, sorahs_errors = fold_journal([path], from_sorah=1, to_sorah=5)
+
+    assert [sorah.sorah_num for sorah in total_entry.sorahs] == [3]
+    assert [sorah_errors.sorah_num for sorah_errors in sorahs_errors] == [3]
@@ -0,0 +1,58 @@
+from transcripers.base_transcriper import PartTask
+from transcripers.long_form import assign_words, part_boundaries_ms
+
+
+def part(number: int, from_ms: float, to_ms: float, speech_ms=None) -> PartTask:
+    return PartTask(
+        sorah_num=58,
+        number=number,
+        audio_file_path="058.mp3",
+        ref_text="",
+        duration_s=(to_ms - from_ms) / 1000,
+        from_ms=from_ms,
+        to_ms=to_ms,
+        speech_ms=speech_ms,
+    )
+
+
+PARTS = [part(1, 0, 4000), part(2, 4000, 9000), part(3, 9000, 12000)]
+
+
+def test_words_go_to_the_part_of_their_midpoint():
+    words = [
+        (0.0, 1.0, " قَدْ"),
+        (1.0, 3.5, " سَمِعَ"),
+        # midpoint 3.75s, still the first part
+        (3.5, 4.0, " ٱللَّهُ"),
+        # crosses the boundary, midpoint 4.25s
+        (3.9, 4.6, " قَوْلَ"),
+        (9.5, 10.0, " ٱلَّتِى"),
+        # transformers leaves the end of the very last word open
+        (11.0, None, " تُجَٰدِلُكَ"),
+    ]
+
+    assert assign_words(words, PARTS) == [
+        "قَدْ سَمِعَ ٱللَّهُ",
+        "قَوْلَ",
+        "ٱلَّتِى تُجَٰدِلُكَ",
+    ]
+
+
+def test_no_words_leave_every_part_empty():
+    assert assign_words([], PARTS) == ["", "", ""]
+
+
+def test_boundaries_split_the_pause_between_speech():
+    parts = [
+        part(1, 0, 4000, speech_ms=(200, 3000)),
+        part(2, 4000, 9000, speech_ms=(1000, 4500)),
+        part(3, 9000, 12000),
+    ]
+
+    # (3000 + 5000) / 2, then (8500 + 9000) / 2
+    assert part_boundaries_ms(parts).tolist() == [4000.0, 8750.0]
+    assert assign_words([(8.6, 8.8, " ٱللَّهِ"), (8.8, 9.0, " وَٱللَّهُ")], parts) == [
+        "",
+        "ٱللَّهِ",
+        "وَٱللَّهُ",
+    ]
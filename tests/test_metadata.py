@@ -0,0 +1,40 @@
+import json
+import pytest
+from transcripers.metadata import JSONMetadataIndex, _build_json_index
+
+
+SORAHS = {
+    "1": [{"text": "بِسْمِ ٱللَّهِ ٱلرَّحْمَٰنِ ٱلرَّحِيمِ"}],
+    "58": [{"text": "قَدْ سَمِعَ ٱللَّهُ"}, {"text": "ٱلَّذِينَ يُظَٰهِرُونَ"}],
+    "114": {"name": "ٱلنَّاسِ", "ayat": 6},
+}
+
+
+@pytest.mark.parametrize("indent", [None, 2, "\t"])
+def test_index_ranges_are_bytes_of_arabic_values(indent):
+    text = json.dumps(SORAHS, ensure_ascii=False, indent=indent)
+    data = text.encode("utf-8")
+
+    index = _build_json_index(text)
+
+    assert list(index) == list(SORAHS)
+    for sorah, (offset, length) in index.items():
+        assert json.loads(data[offset : offset + length]) == SORAHS[sorah]
+
+
+def test_index_rejects_a_list():
+    with pytest.raises(ValueError):
+        _build_json_index(json.dumps([SORAHS]))
+
+
+def test_index_of_crlf_file(tmp_path):
+    path = tmp_path / "metadata.json"
+    path.write_bytes(
+        json.dumps(SORAHS, ensure_ascii=False, indent=2).replace("\n", "\r\n").encode("utf-8")
+    )
+
+    index = JSONMetadataIndex(path)
+
+    assert 58 in index and 2 not in index
+    assert index.load(58) == SORAHS["58"]
+    assert JSONMetadataIndex(path).load(114) == SORAHS["114"]
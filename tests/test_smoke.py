@@ -0,0 +1,86 @@
+import csv
+import json
+from pathlib import Path
+import numpy as np
+import pytest
+from transcripers import AyatTranscriper
+from transcripers.base_transcriper import TranscribeOptions
+from transcripers.audio import SAMPLE_RATE, AudioStore, write_audio_store
+from transcripers.bench import FakeModel
+
+
+def test_fake_model_pipeline(tmp_path: Path):
+    # a PCM store needs no ffmpeg, the source files only have to exist to be hashed
+    sources = tmp_path / "mp3"
+    sources.mkdir()
+    rows = []
+    for sorah_num in (58, 59):
+        for ayah_num in (1, 2, 3):
+            (sources / f"{sorah_num:03}{ayah_num:03}.mp3").write_bytes(
+                f"{sorah_num}:{ayah_num}".encode()
+            )
+            rows.append({"sorah": sorah_num, "text": "قَدْ سَمِعَ ٱللَّهُ"})
+
+    metadata_path = tmp_path / "ayat.csv"
+    with open(metadata_path, "w", encoding="utf-8", newline="") as file:
+        writer = csv.DictWriter(file, fieldnames=["sorah", "text"])
+        writer.writeheader()
+        writer.writerows(rows)
+
+    def load(path: str) -> np.ndarray:
+        return np.full(SAMPLE_RATE, 0.1, dtype=np.float32)
+
+    store_path = tmp_path / "store"
+    write_audio_store(sources.iterdir(), store_path, load=load, verbose=False)
+
+    AyatTranscriper(metadata_path=str(metadata_path), audio_path=str(store_path))(
+        model_id="fake",
+        model_constructor=FakeModel(),
+        options=TranscribeOptions(
+            from_sorah=58, to_sorah=59, batch_size=2, progress=False
+        ),
+        output_dir=str(tmp_path),
+        output_filename="smoke",
+    )
+
+    with open(tmp_path / "smoke.json", "r", encoding="utf-8") as file:
+        total = json.load(file)
+    assert [sorah["sorah_num"] for sorah in total["sorahs"]] == [58, 59]
+    assert all(len(sorah["parts"]) == 3 for sorah in total["sorahs"])
+    assert total["bench_info"]["parts"] == 6
+
+
+def test_audio_store_round_trip(tmp_path: Path):
+    # what load_audio_ffmpeg hands out: int16 PCM / 32768
+    pcm = np.array([-32768, -12345, -1, 0, 1, 12345, 32767], dtype=np.int16)
+    source = tmp_path / "001001.mp3"
+    source.write_bytes(b"001:1")
+
+    write_audio_store(
+        [source],
+        tmp_path / "store",
+        load=lambda path: pcm.astype(np.float32) / 32768.0,
+        verbose=False,
+    )
+
+    wave = AudioStore(tmp_path / "store").read(source.name)
+    assert np.array_equal(wave, pcm.astype(np.float32) / 32768.0)
+
+
+def test_audio_store_keeps_decode_errors(tmp_path: Path):
+    sources = [tmp_path / "002000001.mp3", tmp_path / "002000002.mp3"]
+    for source in sources:
+        source.write_bytes(source.name.encode())
+
+    def load(path: str) -> np.ndarray:
+        if path.endswith("002000002.mp3"):
+            raise RuntimeError("Failed to load audio: broken")
+        return np.zeros(SAMPLE_RATE, dtype=np.float32)
+
+    count = write_audio_store(sources, tmp_path / "store", load=load, verbose=False)
+
+    store = AudioStore(tmp_path / "store")
+    assert count == 1
+    assert len(store.read("002000001.mp3")) == SAMPLE_RATE
+    with pytest.raises(RuntimeError, match="broken"):
+        store.read("002000002.mp3")
@@ -0,0 +1,16 @@
+import pickle
+from transcripers.utils import StageTimer
+
+
+def test_worker_timer_starts_empty():
+    timer = StageTimer()
+    timer.add("metadata", 1.0)
+
+    workers = [pickle.loads(pickle.dumps(timer)) for _ in range(3)]
+    for worker in workers:
+        assert worker.stages == {}
+        worker.add("metadata", 0.5)
+    for worker in workers:
+        timer.merge(worker.stages)
+
+    assert timer.stages["metadata"] == [2.5, 4]
@@ -0,0 +1,231 @@
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from threading import Lock
+from typing import Any, Callable, Final, Iterable
+from sys import stderr
+import json
+import subprocess
+import numpy as np
+from .cache import file_sha256
+
+
+SAMPLE_RATE: Final[int] = 16000
+# float waves are int16 PCM divided by this (what whisper.load_audio does), the
+# store multiplies it back so a wave decoded by ffmpeg round-trips exactly
+PCM_SCALE: Final[float] = 32768.0
+
+
+def load_audio_ffmpeg(path: str, sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+    # the same decoding whisper.load_audio does, without importing whisper
+    cmd = [
+        "ffmpeg",
+        "-nostdin",
+        "-threads",
+        "0",
+        "-i",
+        path,
+        "-f",
+        "s16le",
+        "-ac",
+        "1",
+        "-acodec",
+        "pcm_s16le",
+        "-ar",
+        str(sample_rate),
+        "-",
+    ]
+    try:
+        out = subprocess.run(cmd, capture_output=True, check=True).stdout
+    except subprocess.CalledProcessError as e:
+        raise RuntimeError(f"Failed to load audio: {e.stderr.decode()}") from e
+
+    return np.frombuffer(out, np.int16).flatten().astype(np.float32) / PCM_SCALE
+
+
+def slice_ms(wave: np.ndarray, from_ms: float, to_ms: float) -> np.ndarray:
+    # basic slicing returns a view, the decoded buffer is never copied
+    return wave[round(from_ms * SAMPLE_RATE / 1000) : round(to_ms * SAMPLE_RATE / 1000)]
+
+
+# decodes every file at most once while its parts are being requested from
+# several prefetch threads, keeping the `max_entries` most recent buffers
+class DecodedAudioCache:
+    def __init__(self, load: Callable[[str], np.ndarray], max_entries: int = 2):
+        self._load = load
+        self._max_entries = max_entries
+        self._entries: OrderedDict[str, Future[np.ndarray]] = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, path: str) -> np.ndarray:
+        with self._lock:
+            future = self._entries.get(path)
+            owner = future is None
+            if future is None:
+                future = Future()
+                self._entries[path] = future
+                while len(self._entries) > self._max_entries:
+                    self._entries.popitem(last=False)
+            else:
+                self._entries.move_to_end(path)
+
+        if owner:
+            try:
+                future.set_result(self._load(path))
+            except Exception as e:
+                future.set_exception(e)
+
+        return future.result()
+
+
+STORE_INDEX: Final[str] = "index.json"
+
+
+# decoded 16kHz audio of a whole directory: one int16 blob per sorah plus an
+# index of where every source file lives in it, read back through numpy.memmap
+# so worker processes share the page cache instead of decoding on their own
+class AudioStore:
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        with open(self.path / STORE_INDEX, "r", encoding="utf-8") as file:
+            index = json.load(file)
+
+        self.sample_rate: int = index["sample_rate"]
+        self.dtype = np.dtype(index["dtype"])
+        # stores written before the scale was recorded used the int16 maximum
+        self.scale: float = index.get("scale", np.iinfo(self.dtype).max)
+        self.files: dict[str, dict[str, Any]] = index["files"]
+        self._blobs: dict[str, np.memmap] = {}
+        self._lock = Lock()
+
+    @staticmethod
+    def is_store(path: str | Path) -> bool:
+        return (Path(path) / STORE_INDEX).is_file()
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.files
+
+    def __getstate__(self) -> dict[str, Any]:
+        # memmaps would be pickled as full copies, reopen them in the child
+        state = self.__dict__.copy()
+        state["_blobs"] = {}
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._lock = Lock()
+
+    def _blob(self, blob: str) -> np.memmap:
+        with self._lock:
+            if blob not in self._blobs:
+                self._blobs[blob] = np.memmap(
+                    self.path / blob, dtype=self.dtype, mode="r"
+                )
+            return self._blobs[blob]
+
+    def duration(self, name: str) -> float:
+        # a file that could not be decoded has no samples, reading it raises
+        return self.files[name].get("length", 0) / self.sample_rate
+
+    def sha256(self, name: str) -> str:
+        return self.files[name]["sha256"]
+
+    def read(
+        self, name: str, from_ms: float | None = None, to_ms: float | None = None
+    ) -> np.ndarray:
+        entry = self.files[name]
+        if "error" in entry:
+            raise RuntimeError(entry["error"])
+        samples = self._blob(entry["blob"])[
+            entry["offset"] : entry["offset"] + entry["length"]
+        ]
+        if from_ms is not None and to_ms is not None:
+            samples = slice_ms(samples, from_ms, to_ms)
+
+        # only the requested range is paged in and converted
+        return samples.astype(np.float32) / self.scale
+
+
+def prepare_audio_store(
+    audio_path: str | Path,
+    store_path: str | Path,
+    load: Callable[[str], np.ndarray],
+    workers: int = 4,
+) -> int:
+    return write_audio_store(
+        [file_path for file_path in Path(audio_path).iterdir() if file_path.is_file()],
+        store_path,
+        load=load,
+        workers=workers,
+    )
+
+
+def write_audio_store(
+    file_paths: Iterable[str | Path],
+    store_path: str | Path,
+    load: Callable[[str], np.ndarray],
+    workers: int = 4,
+    verbose: bool = True,
+) -> int:
+    store_path = Path(store_path)
+    store_path.mkdir(parents=True, exist_ok=True)
+
+    groups: dict[str, list[Path]] = {}
+    for file_path in sorted(map(Path, file_paths)):
+        sorah = file_path.name[:3]
+        groups.setdefault(sorah if sorah.isdecimal() else "other", []).append(file_path)
+
+    # a file that fails to decode is recorded with its error instead of stopping
+    # the whole store, its parts then fail on their own like in any other run
+    def decode(file_path: Path) -> tuple[np.ndarray | str, str]:
+        sha256 = file_sha256(file_path)
+        try:
+            wave = load(str(file_path))
+        except Exception as e:
+            return str(e), sha256
+        samples = np.clip(np.rint(wave * PCM_SCALE), -32768, 32767).astype(np.int16)
+        return samples, sha256
+
+    files: dict[str, dict[str, Any]] = {}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for group, group_paths in groups.items():
+            blob = f"{group}.pcm"
+            offset = 0
+            with open(store_path / blob, "wb") as blob_file:
+                for file_path, (samples, sha256) in zip(
+                    group_paths, executor.map(decode, group_paths)
+                ):
+                    if isinstance(samples, str):
+                        files[file_path.name] = {"error": samples, "sha256": sha256}
+                        if verbose:
+                            print(f"{file_path}: {samples}", file=stderr)
+                        continue
+
+                    blob_file.write(samples.tobytes())
+                    files[file_path.name] = {
+                        "blob": blob,
+                        "offset": offset,
+                        "length": len(samples),
+                        "sha256": sha256,
+                    }
+                    offset += len(samples)
+
+            if verbose:
+                print(f"{group}: {len(group_paths)} files, {offset / SAMPLE_RATE:.1f}s")
+
+    index_tmp_path = store_path / f"{STORE_INDEX}.tmp"
+    with open(index_tmp_path, "w", encoding="utf-8") as file:
+        json.dump(
+            {
+                "sample_rate": SAMPLE_RATE,
+                "dtype": "int16",
+                "scale": PCM_SCALE,
+                "files": files,
+            },
+            file,
+            ensure_ascii=False,
+        )
+    index_tmp_path.replace(store_path / STORE_INDEX)
+
+    return sum("error" not in entry for entry in files.values())
@@ -1,79 +1,892 @@
 from abc import ABC, abstractmethod
+from collections import deque
+from contextlib import ExitStack, closing
+from concurrent.futures import Future, ThreadPoolExecutor, ProcessPoolExecutor
+from dataclasses import asdict, dataclass, replace
+from functools import partial
+from multiprocessing import get_context
+from typing import Any, Callable, Iterable, Iterator
+from sys import stderr
+import os
+import time
 from .output_types import *  # type: ignore
-from .utils import path_join, DEVICE  # type: ignore
+from .utils import (  # type: ignore
+    path_join,
+    Counter,
+    count_with_diacritics,
+    batched,
+    partition_by_weight,
+    peak_memory_mb,
+    StageTimer,
+)
 from pathlib import Path
 from json import dump
+import csv
 from pydantic import RootModel
-from .transcribe import Model
+import numpy as np
+from .transcribe import DecodeOptions, Model, Transcribe, Transcription
+from .normalization import DEFAULT_PROFILE, Normalizer
+from .scoring import ScoringPool
+from .trimming import SilenceTrimmer
+from .long_form import assign_words
+from .cache import TranscriptionCache
+from .server import RemoteModel
+from .audio import (
+    AudioStore,
+    DecodedAudioCache,
+    load_audio_ffmpeg,
+    slice_ms,
+    write_audio_store,
+)
+from .journal import (
+    Journal,
+    check_journal_header,
+    fold_journal,
+    journal_shard_path,
+    merge_journal_shards,
+    remove_journal_shards,
+)
+from tempfile import TemporaryDirectory
+from tqdm import tqdm
+
+
+def _format_ratio(value: float | None) -> str:
+    return "-" if value is None else f"{value:.3f}"
+
+
+@dataclass
+class PartTask:
+    sorah_num: int
+    number: int
+    audio_file_path: str
+    ref_text: str
+    duration_s: float
+    # set when audio_file_path holds a whole sorah and the part is only this
+    # range of it
+    from_ms: float | None = None
+    to_ms: float | None = None
+    # where the recitation starts and ends in the audio of the part, from the
+    # word timings of the metadata (used by --trim-silence timings)
+    speech_ms: tuple[float, float] | None = None
+    # set when the task is a whole recording transcribed in one long-form pass,
+    # its prediction is split into these parts by the word timestamps
+    parts: list["PartTask"] | None = None
+
+
+@dataclass
+class LoadedPart:
+    task: PartTask
+    audio: np.ndarray | None = None
+    cache_key: str | None = None
+    audio_load_time: float | None = None
+    trimmed_s: float | None = None
+    # the raw prediction, or the error that prevented it
+    result: Transcription | Exception | None = None
+    # (prediction, reference) after normalization and the telemetry of the
+    # part, kept until its score comes back from the scoring pool
+    normalized: tuple[str, str] | None = None
+    bench_data: Benchmark | None = None
+
+
+# everything a run is configured with besides the model and where its output
+# goes, passed whole from the cli to transcribe/compare and into the worker
+# processes
+@dataclass(frozen=True)
+class TranscribeOptions:
+    normalize_text: bool = True
+    normalization: str = DEFAULT_PROFILE
+    from_sorah: int = 1
+    to_sorah: int = 114
+    device: str | None = None
+    batch_size: int = 1
+    short_form: bool = False
+    precision: str = "fp32"
+    weights_cache: str | None = None
+    decode_options: DecodeOptions | None = None
+    draft_model: str | None = None
+    trim_silence: str = "none"
+    trim_threshold_db: float = -40.0
+    trim_padding_ms: float = 200.0
+    schedule: str = "ordered"
+    prefetch: int = 4
+    prefetch_workers: int = 2
+    cache_dir: str | None = None
+    cache_size_mb: int = 1024
+    resume: bool = False
+    workers: int = 1
+    torch_threads: int | None = None
+    scoring_workers: int = 1
+    scoring_processes: bool = False
+    progress: bool = True
+
+    @property
+    def text_normalization(self) -> str:
+        # references and predictions go through the same profile
+        return self.normalization if self.normalize_text else "none"
+
+    def model_options(self, word_timestamps: bool) -> dict[str, Any]:
+        return dict(
+            device=self.device,
+            batch_size=self.batch_size,
+            short_form=self.short_form,
+            precision=self.precision,
+            weights_cache=self.weights_cache,
+            word_timestamps=word_timestamps,
+            decode_options=self.decode_options,
+            draft_model=self.draft_model,
+        )
+
+    def trimmer(self) -> SilenceTrimmer | None:
+        if self.trim_silence == "none":
+            return None
+        return SilenceTrimmer(
+            self.trim_silence,
+            threshold_db=self.trim_threshold_db,
+            padding_ms=self.trim_padding_ms,
+        )
 
 
 class BaseTranscriper(ABC):
+    # whether the tasks need word timestamps from the model (long-form tasks)
+    word_timestamps: bool = False
+
     def __init__(self, metadata_path: str, audio_path: str):
         self.metadata_path = Path(metadata_path)
         self.audio_path = Path(audio_path)
+        # AUDIO_PATH may be a directory prepared by `main.py prepare-audio`
+        self.audio_store = (
+            AudioStore(self.audio_path) if AudioStore.is_store(self.audio_path) else None
+        )
+        self.timer = StageTimer()
 
     @abstractmethod
+    def load_tasks(self, from_sorah: int, to_sorah: int) -> Iterable[PartTask]:
+        pass
+
+    def load_references(
+        self, from_sorah: int = 1, to_sorah: int = 114
+    ) -> dict[tuple[int, int], str]:
+        # (sorah_num, part number) -> reference text, without touching the audio
+        return {
+            (part.sorah_num, part.number): part.ref_text
+            for task in self.load_tasks(from_sorah, to_sorah)
+            for part in (task.parts if task.parts is not None else [task])
+        }
+
     def transcribe(
         self,
         *,
         model_id: str,
         model_constructor: Model,
-        normalize_text: bool,
-        from_sorah: int,
-        to_sorah: int,
-        device: str,
+        options: TranscribeOptions | None = None,
+        journal_path: str | None = None,
+        tasks: Iterable[PartTask] | None = None,
     ) -> tuple[TotalEntry, list[OutputSorahErrorsEntry]]:
-        pass
+        if options is None:
+            options = TranscribeOptions()
+
+        with ExitStack() as stack:
+            if journal_path is None:
+                tmp_dir = stack.enter_context(TemporaryDirectory())
+                journal_path = path_join(Path(tmp_dir), "journal.jsonl")
+
+            header = self._journal_header(model_id, model_constructor, options)
+            if options.resume:
+                check_journal_header(journal_path, header)
+                merge_journal_shards(journal_path)
+                with Journal(journal_path, resume=True, header=header) as journal:
+                    done = journal.done()
+                if len(done) > 0:
+                    print(f"Resuming: skipping {len(done)} already transcribed parts")
+            else:
+                remove_journal_shards(journal_path)
+                Journal(journal_path, header=header).close()
+                done = set()
+
+            # tasks are passed in when they are shared by several models
+            # a long-form task runs again unless all of its parts are done, its
+            # parts are then written again and the last record wins
+            tasks = (
+                task
+                for task in (
+                    self.load_tasks(options.from_sorah, options.to_sorah)
+                    if tasks is None
+                    else tasks
+                )
+                if any(
+                    (part.sorah_num, part.number) not in done
+                    for part in (task.parts if task.parts is not None else [task])
+                )
+            )
+
+            run_shard = partial(
+                self._run_shard, model_id=model_id, model_constructor=model_constructor
+            )
+            if options.workers <= 1:
+                counts = [run_shard(tasks, journal_path, options=options)]
+            else:
+                shard_options = options
+                if options.torch_threads is None:
+                    shard_options = replace(
+                        options,
+                        torch_threads=max(1, (os.cpu_count() or 1) // options.workers),
+                    )
+
+                shards = partition_by_weight(
+                    list(tasks), options.workers, weight=lambda task: task.duration_s
+                )
+
+                counts = []
+                if len(shards) > 0:
+                    # every worker loads its own model, spawn keeps the torch/CUDA
+                    # state of the parent out of the children
+                    with ProcessPoolExecutor(
+                        max_workers=len(shards), mp_context=get_context("spawn")
+                    ) as executor:
+                        futures = [
+                            executor.submit(
+                                run_shard,
+                                shard,
+                                journal_shard_path(journal_path, index),
+                                options=shard_options,
+                                shard_index=index,
+                            )
+                            for index, shard in enumerate(shards)
+                        ]
+                        counts = [future.result() for future in futures]
+
+                    for _, _, stages, _ in counts:
+                        self.timer.merge(stages)
+                    merge_journal_shards(journal_path)
+
+            total_count = sum(total for total, _, _, _ in counts)
+            with_diacritics_count = sum(
+                with_diacritics for _, with_diacritics, _, _ in counts
+            )
+
+            print(f"Total count: {total_count}")
+            print(f"With diacritics count: {with_diacritics_count}")
+            if total_count > 0:
+                print(
+                    f"Percentage of with diacritics to total count: {with_diacritics_count / total_count * 100}%"
+                )
+
+            with self.timer("serialization"):
+                total_entry, sorahs_errors = fold_journal(
+                    [journal_path],
+                    from_sorah=options.from_sorah,
+                    to_sorah=options.to_sorah,
+                )
+            # every worker loads the same model with the same options
+            total_entry.model_info = next(
+                (model_info for _, _, _, model_info in counts), None
+            )
+            return total_entry, sorahs_errors
+
+    def _journal_header(
+        self, model_id: str, model_constructor: Model, options: TranscribeOptions
+    ) -> dict[str, Any]:
+        # what the journaled results depend on, a --resume with anything else
+        # would fold two kinds of results into one output
+        if isinstance(model_constructor, RemoteModel):
+            # generate --server: the served model with the settings it was
+            # loaded with, the model options of this process do not apply
+            model_settings: dict[str, Any] = dict(model=model_constructor.identity())
+        else:
+            model_settings = dict(
+                model_id=model_id,
+                model_constructor=type(model_constructor).__name__,
+                short_form=options.short_form,
+                precision=options.precision,
+                decode_options=None
+                if options.decode_options is None
+                else asdict(options.decode_options),
+            )
+        return dict(
+            transcriber=type(self).__name__,
+            **model_settings,
+            word_timestamps=self.word_timestamps,
+            normalization=options.text_normalization,
+            trim_silence=options.trim_silence,
+            trim_threshold_db=options.trim_threshold_db,
+            trim_padding_ms=options.trim_padding_ms,
+        )
+
+    def _run_shard(
+        self,
+        tasks: Iterable[PartTask],
+        journal_path: str,
+        *,
+        model_id: str,
+        model_constructor: Model,
+        options: TranscribeOptions,
+        shard_index: int | None = None,
+    ) -> tuple[int, int, dict[str, list[float]], dict[str, Any]]:
+        if options.torch_threads is not None:
+            import torch
+
+            torch.set_num_threads(options.torch_threads)
+
+        total_counter = Counter()
+        with_diacritics_counter = Counter()
+        count = count_with_diacritics(total_counter, with_diacritics_counter)
+        normalizer = Normalizer(options.text_normalization)
+        trimmer = options.trimmer()
+
+        with self.timer("model_load"):
+            model = model_constructor.construct_model(
+                model_id, **options.model_options(self.word_timestamps)
+            )
+
+        with ExitStack() as stack:
+            cache = None
+            model_key = ""
+            if options.cache_dir is not None:
+                cache = stack.enter_context(
+                    closing(
+                        TranscriptionCache(
+                            options.cache_dir,
+                            max_size_bytes=options.cache_size_mb * 1024 * 1024,
+                        )
+                    )
+                )
+                model_key = cache.model_key(model.identity())
+
+            journal = stack.enter_context(Journal(journal_path, resume=True))
+
+            # running WER/RTF of this process, updated as every part is scored
+            totals = RunningTotals()
+            progress_bar = stack.enter_context(
+                tqdm(
+                    desc="parts" if shard_index is None else f"worker {shard_index}",
+                    position=shard_index or 0,
+                    unit="part",
+                    disable=not options.progress,
+                    dynamic_ncols=True,
+                )
+            )
+
+            if options.schedule == "bucketed" and options.batch_size > 1:
+                # the whole work list longest first, so every model call gets
+                # parts of about the same length and pads them the least (the
+                # journal is folded back into sorah/part order). Longest first
+                # also runs into an out of memory error right away, if at all
+                tasks = sorted(tasks, key=lambda task: task.duration_s, reverse=True)
+                if self.audio_store is None and any(
+                    task.from_ms is not None for task in tasks
+                ):
+                    print(
+                        "bucketed parts of a sorah recording are far apart, the recording "
+                        "may be decoded several times (`main.py prepare-audio` avoids it)",
+                        file=stderr,
+                    )
+
+            loaded_parts = self._prefetch(
+                partial(
+                    self._load_part,
+                    model,
+                    DecodedAudioCache(model.load_audio_wave),
+                    cache,
+                    model_key,
+                    trimmer,
+                ),
+                tasks,
+                depth=options.prefetch,
+                workers=options.prefetch_workers,
+            )
+
+            scoring_pool = stack.enter_context(
+                ScoringPool(
+                    options.scoring_workers, processes=options.scoring_processes
+                )
+            )
+            # batches whose alignments are still being computed, written to the
+            # journal in order once their scores are in
+            scoring: deque[
+                tuple[list[LoadedPart], Future[tuple[list[WERInfo | Exception], float]]]
+            ] = deque()
+
+            def write_batch(
+                batch: list[LoadedPart],
+                future: Future[tuple[list[WERInfo | Exception], float]],
+            ) -> None:
+                with self.timer("scoring_wait"):
+                    wer_infos, seconds = future.result()
+                self.timer.add("scoring", seconds, count=len(wer_infos))
+
+                scores = iter(wer_infos)
+                for part in batch:
+                    task = part.task
+                    result = part.result if part.normalized is None else next(scores)
+                    if isinstance(result, Exception):
+                        journal.write_error(
+                            task.sorah_num,
+                            OutputPartErrorEntry(number=task.number, error_msg=str(result)),
+                        )
+                        progress_bar.update()
+                        continue
+
+                    prediction_text, ref_text = part.normalized  # type: ignore
+                    part_entry = OutputPartEntry(
+                        number=task.number,
+                        pred_text=prediction_text,
+                        ref_text=ref_text,
+                        wer_info=result,  # type: ignore
+                        bench_data=part.bench_data,  # type: ignore
+                        raw_pred_text=part.result.text,  # type: ignore
+                        raw_ref_text=task.ref_text,
+                    )
+                    with self.timer("serialization"):
+                        journal.write_part(task.sorah_num, part_entry)
+
+                    totals.add(part_entry)
+                    progress_bar.set_postfix_str(
+                        f"WER {_format_ratio(totals.wer)}, RTF {_format_ratio(totals.rtf)}",
+                        refresh=False,
+                    )
+                    progress_bar.update()
+
+            for batch in batched(loaded_parts, options.batch_size):
+                self._transcribe_batch(model, cache, batch)
+                batch = [
+                    split_part for part in batch for split_part in self._split_long_form(part)
+                ]
+                peak_memory = peak_memory_mb()
+
+                transcribed = [
+                    part for part in batch if not isinstance(part.result, Exception)
+                ]
+                with self.timer("normalization", count=len(transcribed)):
+                    for part in transcribed:
+                        count(part.result.text)  # type: ignore
+                    # predictions and references of the whole batch in one pass
+                    normalized = normalizer.normalize_batch(
+                        [part.result.text for part in transcribed]  # type: ignore
+                        + [part.task.ref_text for part in transcribed]
+                    )
+
+                pairs: list[tuple[str, str]] = []
+                for part, prediction_text, ref_text in zip(
+                    transcribed,
+                    normalized[: len(transcribed)],
+                    normalized[len(transcribed) :],
+                ):
+                    part.normalized = (prediction_text, ref_text)
+                    part.bench_data = self._benchmark(part, part.result, peak_memory)  # type: ignore
+                    pairs.append((ref_text, prediction_text))
+
+                scoring.append((batch, scoring_pool.submit(pairs)))
+                while len(scoring) > 2 * max(1, options.scoring_workers):
+                    write_batch(*scoring.popleft())
+
+            while len(scoring) > 0:
+                write_batch(*scoring.popleft())
+
+        return (
+            total_counter.current_value(),
+            with_diacritics_counter.current_value(),
+            self.timer.stages,
+            model.identity(),
+        )
+
+    def _audio_key(
+        self,
+        cache: TranscriptionCache,
+        task: PartTask,
+        trimmer: SilenceTrimmer | None = None,
+    ) -> str:
+        if self.audio_store is not None:
+            audio_key = self.audio_store.sha256(Path(task.audio_file_path).name)
+        else:
+            audio_key = cache.file_hash(task.audio_file_path)
+        if task.from_ms is not None:
+            audio_key = f"{audio_key}:{task.from_ms}-{task.to_ms}"
+        if trimmer is not None:
+            audio_key = f"{audio_key}:{trimmer.key(task.speech_ms)}"
+        return audio_key
+
+    def _load_part(
+        self,
+        model: Transcribe,
+        decoded_audio: DecodedAudioCache,
+        cache: TranscriptionCache | None,
+        model_key: str,
+        trimmer: SilenceTrimmer | None,
+        task: PartTask,
+    ) -> LoadedPart:
+        part = LoadedPart(task=task)
+
+        try:
+            if cache is not None:
+                part.cache_key = cache.key(
+                    model_key, self._audio_key(cache, task, trimmer)
+                )
+                part.result = cache.get(part.cache_key)
+                if part.result is not None:
+                    return part
+
+            time_start = time.perf_counter()
+            with self.timer("audio_decoding"):
+                if self.audio_store is not None:
+                    part.audio = self.audio_store.read(
+                        Path(task.audio_file_path).name, task.from_ms, task.to_ms
+                    )
+                elif task.from_ms is None:
+                    part.audio = model.load_audio_wave(task.audio_file_path)
+                else:
+                    part.audio = slice_ms(
+                        decoded_audio.get(task.audio_file_path), task.from_ms, task.to_ms  # type: ignore
+                    )
+            # the word timestamps of a long-form task must stay on the timeline
+            # of its parts
+            if trimmer is not None and task.parts is None:
+                with self.timer("trimming"):
+                    part.audio, part.trimmed_s = trimmer(part.audio, task.speech_ms)
+            part.audio_load_time = time.perf_counter() - time_start
+        except Exception as e:
+            part.result = e
+
+        return part
+
+    def _split_long_form(self, part: LoadedPart) -> list[LoadedPart]:
+        parts = part.task.parts
+        if parts is None:
+            return [part]
+
+        result = part.result
+        if not isinstance(result, Exception) and result.words is None:  # type: ignore
+            result = ValueError("long-form transcription returned no word timestamps")
+        if isinstance(result, Exception):
+            return [LoadedPart(task=task, result=result) for task in parts]
+
+        with self.timer("alignment", count=len(parts)):
+            texts = assign_words(result.words, parts)  # type: ignore
+
+        # the compute of the single pass is attributed by audio duration
+        total_duration_s = sum(task.duration_s for task in parts) or 1.0
+
+        def share(value: float | None, task: PartTask) -> float | None:
+            return None if value is None else value * task.duration_s / total_duration_s
+
+        return [
+            LoadedPart(
+                task=task,
+                audio_load_time=share(part.audio_load_time, task),
+                result=Transcription(
+                    text=text,
+                    processing_time=share(result.processing_time, task),  # type: ignore
+                    feature_extraction_time=share(result.feature_extraction_time, task),  # type: ignore
+                    inference_time=share(result.inference_time, task),  # type: ignore
+                    padding_s=share(result.padding_s, task),  # type: ignore
+                ),
+            )
+            for task, text in zip(parts, texts)
+        ]
+
+    def _prefetch(
+        self,
+        load: Callable[[PartTask], LoadedPart],
+        tasks: Iterable[PartTask],
+        depth: int,
+        workers: int,
+    ) -> Iterator[LoadedPart]:
+        if depth < 1:
+            yield from map(load, tasks)
+            return
+
+        # decode the next `depth` files in the background while the model is
+        # busy, yielding them back in task order
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            pending: deque[Future[LoadedPart]] = deque()
+
+            for task in tasks:
+                pending.append(executor.submit(load, task))
+                while len(pending) > depth:
+                    yield pending.popleft().result()
+
+            while len(pending) > 0:
+                yield pending.popleft().result()
+
+    def _transcribe_batch(
+        self,
+        model: Transcribe,
+        cache: TranscriptionCache | None,
+        batch: list[LoadedPart],
+    ) -> None:
+        pending = [part for part in batch if part.result is None]
+        if len(pending) == 0:
+            return
+
+        results: list[Transcription | Exception]
+        with self.timer("inference", count=len(pending)):
+            try:
+                results = list(model.transcribe_batch([part.audio for part in pending]))  # type: ignore
+            except Exception as e:
+                if len(pending) == 1:
+                    results = [e]
+                else:
+                    # one bad file must not fail the whole batch, so retry one
+                    # by one to attribute the error to the right part
+                    results = []
+                    for part in pending:
+                        try:
+                            results.append(model(part.audio))  # type: ignore
+                        except Exception as e:
+                            results.append(e)
+
+        for part, result in zip(pending, results):
+            part.result = result
+            part.audio = None
+
+            if (
+                cache is not None
+                and part.cache_key is not None
+                and not isinstance(result, Exception)
+            ):
+                cache.put(part.cache_key, result)
+
+    def _benchmark(
+        self,
+        part: LoadedPart,
+        transcription: Transcription,
+        peak_memory: tuple[float | None, float | None],
+    ) -> Benchmark:
+        peak_rss_mb, peak_allocated_mb = peak_memory
+        # a cached prediction padded nothing in this run
+        transcribed = part.audio_load_time is not None
+        return Benchmark(
+            duration_s=part.task.duration_s,
+            processing_time_s=transcription.processing_time,
+            audio_load_time_s=part.audio_load_time,
+            feature_extraction_time_s=transcription.feature_extraction_time,
+            inference_time_s=transcription.inference_time,
+            generated_tokens=transcription.generated_tokens,
+            decode_attempts=transcription.decode_attempts,
+            draft_tokens=transcription.draft_tokens,
+            estimated_accepted_draft_tokens=transcription.estimated_accepted_draft_tokens,
+            trimmed_s=part.trimmed_s,
+            padding_s=transcription.padding_s if transcribed else None,
+            idle_decoder_steps=transcription.idle_decoder_steps if transcribed else None,
+            peak_rss_mb=peak_rss_mb,
+            peak_allocated_mb=peak_allocated_mb,
+        )
 
     def __call__(
         self,
         *,
         model_id: str,
         model_constructor: Model,
-        normalize_text: bool = True,
-        from_sorah: int = 1,
-        to_sorah: int = 114,
-        device: str = DEVICE,
+        options: TranscribeOptions | None = None,
         output_dir: str = ".",
         output_filename: str | None = None,
     ) -> None:
+        if output_filename is None:
+            output_filename = self.audio_path.name
+
+        output_dir_path = Path(output_dir)
+
         total_entry, output_sorahs_errors = self.transcribe(
             model_id=model_id,
             model_constructor=model_constructor,
-            normalize_text=normalize_text,
-            from_sorah=from_sorah,
-            to_sorah=to_sorah,
-            device=device,
+            options=options,
+            journal_path=path_join(output_dir_path, f"{output_filename}.jsonl"),
         )
 
-        output_sorahs_errors_obj = [
-            RootModel[OutputSorahErrorsEntry](sorahs_errors).model_dump()
-            for sorahs_errors in output_sorahs_errors
-        ]
+        self._write_outputs(
+            total_entry, output_sorahs_errors, output_dir_path, output_filename
+        )
+
+    def _write_outputs(
+        self,
+        total_entry: TotalEntry,
+        output_sorahs_errors: list[OutputSorahErrorsEntry],
+        output_dir_path: Path,
+        output_filename: str,
+    ) -> None:
+        with self.timer("serialization"):
+            output_sorahs_errors_obj = [
+                RootModel[OutputSorahErrorsEntry](sorahs_errors).model_dump()
+                for sorahs_errors in output_sorahs_errors
+            ]
+
+            with open(
+                path_join(output_dir_path, f"{output_filename}.json"),
+                "w",
+                encoding="utf-8",
+            ) as file:
+                dump(
+                    RootModel[TotalEntry](total_entry).model_dump(),  # type: ignore
+                    file,
+                    ensure_ascii=False,
+                )
+
+            with open(
+                path_join(output_dir_path, f"{output_filename}_errors.json"),
+                "w",
+                encoding="utf-8",
+            ) as file:
+                dump(
+                    output_sorahs_errors_obj,
+                    file,
+                    ensure_ascii=False,
+                )
 
+    def compare(
+        self,
+        *,
+        model_ids: list[str],
+        model_constructor: Model,
+        options: TranscribeOptions | None = None,
+        model_workers: int = 1,
+        output_dir: str = ".",
+        output_filename: str | None = None,
+    ) -> None:
+        if options is None:
+            options = TranscribeOptions()
         if output_filename is None:
             output_filename = self.audio_path.name
 
         output_dir_path = Path(output_dir)
+        labels = model_labels(model_ids)
+
+        # metadata is parsed and the references are built once for all models
+        tasks = list(self.load_tasks(options.from_sorah, options.to_sorah))
+
+        with ExitStack() as stack:
+            if self.audio_store is None:
+                # every source file is decoded once into a temporary PCM store
+                # that the models (and their processes) memory-map
+                store_dir = stack.enter_context(
+                    TemporaryDirectory(prefix=".audio-", dir=output_dir_path)
+                )
+                with self.timer("audio_decoding"):
+                    write_audio_store(
+                        {
+                            task.audio_file_path
+                            for task in tasks
+                            if Path(task.audio_file_path).is_file()
+                        },
+                        store_dir,
+                        load=load_audio_ffmpeg,
+                        verbose=False,
+                    )
+                self.audio_store = AudioStore(store_dir)
+                stack.callback(setattr, self, "audio_store", None)
 
-        with open(
-            path_join(output_dir_path, f"{output_filename}.json"),
-            "w",
-            encoding="utf-8",
-        ) as file:
-            dump(
-                RootModel[TotalEntry](total_entry).model_dump(),  # type: ignore
-                file,
-                ensure_ascii=False,
+            model_runs = [
+                dict(
+                    model_id=model_id,
+                    model_constructor=model_constructor,
+                    journal_path=path_join(
+                        output_dir_path, f"{output_filename}.{label}.jsonl"
+                    ),
+                    tasks=tasks,
+                )
+                for model_id, label in zip(model_ids, labels)
+            ]
+
+            if model_workers <= 1:
+                results = [
+                    self.transcribe(**model_run, options=options)
+                    for model_run in model_runs
+                ]
+            else:
+                # one process per model, all reading the same store, their
+                # progress bars would overwrite each other
+                with ProcessPoolExecutor(
+                    max_workers=model_workers, mp_context=get_context("spawn")
+                ) as executor:
+                    futures = [
+                        executor.submit(
+                            self._transcribe_with_stages,
+                            **model_run,
+                            options=replace(options, progress=False),
+                        )
+                        for model_run in model_runs
+                    ]
+                    results = []
+                    for label, future in zip(labels, futures):
+                        result, stages = future.result()
+                        self.timer.merge(stages)
+                        results.append(result)
+                        print(f"{label}: done")
+
+        for label, (total_entry, output_sorahs_errors) in zip(labels, results):
+            self._write_outputs(
+                total_entry,
+                output_sorahs_errors,
+                output_dir_path,
+                f"{output_filename}.{label}",
             )
 
-        with open(
-            path_join(output_dir_path, f"{output_filename}_errors.json"),
-            "w",
-            encoding="utf-8",
-        ) as file:
-            dump(
-                output_sorahs_errors_obj,
-                file,
-                ensure_ascii=False,
+        with self.timer("serialization"):
+            table = wer_comparison_table(
+                labels, [total_entry for total_entry, _ in results]
             )
+            with open(
+                path_join(output_dir_path, f"{output_filename}_comparison.csv"),
+                "w",
+                encoding="utf-8",
+                newline="",
+            ) as file:
+                csv.writer(file).writerows(table)
+
+        widths = [max(len(row[column]) for row in table) for column in range(len(table[0]))]
+        for row in table:
+            print("  ".join(cell.rjust(width) for cell, width in zip(row, widths)))
+
+    def _transcribe_with_stages(
+        self, **transcribe_kwargs: Any
+    ) -> tuple[
+        tuple[TotalEntry, list[OutputSorahErrorsEntry]], dict[str, list[float]]
+    ]:
+        result = self.transcribe(**transcribe_kwargs)
+        return result, self.timer.stages
+
+
+def model_labels(model_ids: list[str]) -> list[str]:
+    # output file names: the checkpoint file name or the model name
+    labels: list[str] = []
+    for model_id in model_ids:
+        label = Path(model_id).stem if Path(model_id).is_file() else model_id
+        label = label.replace("/", "_")
+        if label in labels:
+            label = f"{label}-{len(labels)}"
+        labels.append(label)
+    return labels
+
+
+def wer_comparison_table(
+    labels: list[str], total_entries: list[TotalEntry]
+) -> list[list[str]]:
+    def wer(wer_info: WERInfo) -> str:
+        return "-" if wer_info.wer is None else f"{wer_info.wer:.4f}"
+
+    sorah_nums = sorted(
+        {
+            sorah.sorah_num
+            for total_entry in total_entries
+            for sorah in total_entry.sorahs
+            if len(sorah.parts) > 0
+        }
+    )
+    sorah_wers = [
+        {sorah.sorah_num: sorah.totals.wer_info() for sorah in total_entry.sorahs}
+        for total_entry in total_entries
+    ]
+
+    table = [["sorah", *labels]]
+    for sorah_num in sorah_nums:
+        table.append(
+            [
+                str(sorah_num),
+                *(
+                    wer(wers[sorah_num]) if sorah_num in wers else "-"
+                    for wers in sorah_wers
+                ),
+            ]
+        )
+    table.append(
+        ["total", *(wer(total_entry.totals.wer_info()) for total_entry in total_entries)]
+    )
+    return table
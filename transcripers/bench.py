@@ -0,0 +1,317 @@
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import Any, Final, Sequence, Union
+import csv
+import json
+import random
+import shutil
+import subprocess
+import time
+import numpy as np
+from .audio import SAMPLE_RATE, load_audio_ffmpeg, prepare_audio_store
+from .ayat_transcriper import AyatTranscriper, sorah_ayah_format
+from .quran_transcriper import QuranComTranscriper, sorah_part_format
+from .base_transcriper import BaseTranscriper, TranscribeOptions
+from .transcribe import AudioInput, Transcribe, Transcription, as_audio_wave
+
+
+VOCABULARY: Final[list[str]] = [
+    "قَدْ",
+    "سَمِعَ",
+    "ٱللَّهُ",
+    "قَوْلَ",
+    "ٱلَّتِى",
+    "تُجَٰدِلُكَ",
+    "فِى",
+    "زَوْجِهَا",
+    "وَتَشْتَكِىٓ",
+    "إِلَى",
+    "يَسْمَعُ",
+    "تَحَاوُرَكُمَآ",
+    "إِنَّ",
+    "سَمِيعٌۢ",
+    "بَصِيرٌ",
+]
+
+WORDS_PER_SECOND: Final[float] = 1.5
+
+
+# stand-in for the whisper backends: deterministic output derived from the
+# audio length, so the pipeline overhead can be measured without a GPU,
+# network access or model weights
+class FakeModel:
+    def __init__(self, inference_rtf: float = 0.0):
+        # seconds of simulated inference per second of audio
+        self.inference_rtf = inference_rtf
+
+    def construct_model(
+        self,
+        path: Union[str, Path],
+        device: str | None = None,
+        batch_size: int = 1,
+        **options: Any,
+    ) -> Transcribe:
+        self.path = str(path)
+        self.batch_size = batch_size
+        return self
+
+    def identity(self) -> dict[str, Any]:
+        return {
+            "backend": type(self).__name__,
+            "model": self.path,
+            "options": {"inference_rtf": self.inference_rtf},
+        }
+
+    def load_audio_wave(self, audio_file_path: Union[str, Path]) -> np.ndarray:
+        return load_audio_ffmpeg(str(audio_file_path))
+
+    def __call__(self, audio: AudioInput) -> Transcription:
+        return self.transcribe_batch([audio])[0]
+
+    def transcribe_batch(self, audios: Sequence[AudioInput]) -> list[Transcription]:
+        audio_waves = [as_audio_wave(self, audio) for audio in audios]
+        time_start = time.perf_counter()
+
+        texts = []
+        for audio_wave in audio_waves:
+            rng = random.Random(len(audio_wave))
+            words_count = max(1, round(len(audio_wave) / SAMPLE_RATE * WORDS_PER_SECOND))
+            texts.append([rng.choice(VOCABULARY) for _ in range(words_count)])
+
+        if self.inference_rtf > 0:
+            time.sleep(
+                self.inference_rtf * sum(map(len, audio_waves)) / SAMPLE_RATE
+            )
+
+        processing_time = (time.perf_counter() - time_start) / len(audio_waves)
+        return [
+            Transcription(
+                text=" ".join(words),
+                processing_time=processing_time,
+                inference_time=processing_time,
+                generated_tokens=len(words),
+            )
+            for words in texts
+        ]
+
+
+def _synthetic_wave(duration_s: float, rng: random.Random) -> np.ndarray:
+    t = np.arange(round(duration_s * SAMPLE_RATE)) / SAMPLE_RATE
+    wave = 0.3 * np.sin(2 * np.pi * rng.uniform(100, 300) * t)
+    wave += np.random.default_rng(rng.randrange(1 << 32)).normal(0, 0.05, len(t))
+    return (np.clip(wave, -1, 1) * np.iinfo(np.int16).max).astype(np.int16)
+
+
+def _encode_mp3(samples: np.ndarray, path: Path) -> None:
+    subprocess.run(
+        [
+            "ffmpeg",
+            "-y",
+            "-loglevel",
+            "error",
+            "-f",
+            "s16le",
+            "-ar",
+            str(SAMPLE_RATE),
+            "-ac",
+            "1",
+            "-i",
+            "-",
+            "-b:a",
+            "64k",
+            str(path),
+        ],
+        input=samples.tobytes(),
+        check=True,
+    )
+
+
+def _words(duration_s: float, rng: random.Random) -> list[str]:
+    return [
+        rng.choice(VOCABULARY)
+        for _ in range(max(1, round(duration_s * WORDS_PER_SECOND)))
+    ]
+
+
+def generate_ayat_dataset(
+    root: Path,
+    from_sorah: int,
+    to_sorah: int,
+    parts_per_sorah: int,
+    durations: tuple[float, float],
+    rng: random.Random,
+) -> tuple[Path, Path, float]:
+    audio_path = root / "audio"
+    audio_path.mkdir()
+    metadata_path = root / "ayat.csv"
+    total_duration = 0.0
+
+    with open(metadata_path, "w", encoding="utf-8", newline="") as file:
+        writer = csv.DictWriter(file, fieldnames=["sorah", "aya", "text"])
+        writer.writeheader()
+        for sorah_num in range(1, 115):
+            in_range = from_sorah <= sorah_num <= to_sorah
+            for ayah_num in range(1, (parts_per_sorah if in_range else 1) + 1):
+                duration = rng.uniform(*durations)
+                writer.writerow(
+                    {
+                        "sorah": sorah_num,
+                        "aya": ayah_num,
+                        "text": " ".join(_words(duration, rng)),
+                    }
+                )
+                if in_range:
+                    _encode_mp3(
+                        _synthetic_wave(duration, rng),
+                        audio_path / sorah_ayah_format(sorah_num, ayah_num),
+                    )
+                    total_duration += duration
+
+    return metadata_path, audio_path, total_duration
+
+
+def generate_quran_com_dataset(
+    root: Path,
+    from_sorah: int,
+    to_sorah: int,
+    parts_per_sorah: int,
+    durations: tuple[float, float],
+    rng: random.Random,
+) -> tuple[Path, Path, float]:
+    audio_path = root / "audio"
+    audio_path.mkdir()
+    metadata_path = root / "metadata.json"
+    total_duration = 0.0
+
+    sheikh_info: dict[str, list[dict[str, Any]]] = {}
+    for sorah_num in range(from_sorah, to_sorah + 1):
+        parts = []
+        from_ms = 0.0
+        for part_num in range(1, parts_per_sorah + 1):
+            duration = rng.uniform(*durations)
+            words = _words(duration, rng)
+            word_ms = duration * 1000 / len(words)
+            parts.append(
+                {
+                    "from_ms": from_ms,
+                    "to_ms": from_ms + duration * 1000,
+                    "number": part_num,
+                    "starting_ayah_number": part_num,
+                    "ending_ayah_number": part_num,
+                    "cutting_blindly": False,
+                    "segments": [
+                        {
+                            "index": index,
+                            "start_ms": from_ms + index * word_ms,
+                            "end_ms": from_ms + (index + 1) * word_ms,
+                            "word": word,
+                            "waqf": "empty",
+                        }
+                        for index, word in enumerate(words)
+                    ],
+                }
+            )
+            _encode_mp3(
+                _synthetic_wave(duration, rng),
+                audio_path / sorah_part_format(sorah_num, part_num),
+            )
+            from_ms += duration * 1000
+            total_duration += duration
+        sheikh_info[str(sorah_num)] = parts
+
+    with open(metadata_path, "w", encoding="utf-8") as file:
+        json.dump(sheikh_info, file, ensure_ascii=False)
+
+    return metadata_path, audio_path, total_duration
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=Path(__file__).parent,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_bench(
+    *,
+    transcriber: str,
+    from_sorah: int,
+    to_sorah: int,
+    parts_per_sorah: int = 10,
+    durations: tuple[float, float] = (2.0, 28.0),
+    batch_size: int = 1,
+    schedule: str = "ordered",
+    prefetch: int = 4,
+    prefetch_workers: int = 2,
+    audio_store: bool = False,
+    inference_rtf: float = 0.0,
+    seed: int = 0,
+) -> dict[str, Any]:
+    if shutil.which("ffmpeg") is None:
+        raise RuntimeError("ffmpeg is needed to encode and decode the synthetic audio")
+
+    rng = random.Random(seed)
+    generate, cls = {
+        "AyatTranscriper": (generate_ayat_dataset, AyatTranscriper),
+        "QuranComTranscriper": (generate_quran_com_dataset, QuranComTranscriper),
+    }[transcriber]
+
+    with TemporaryDirectory() as tmp_dir:
+        root = Path(tmp_dir)
+        metadata_path, audio_path, total_duration = generate(
+            root, from_sorah, to_sorah, parts_per_sorah, durations, rng
+        )
+        if audio_store:
+            prepare_audio_store(audio_path, root / "store", load=load_audio_ffmpeg)
+            audio_path = root / "store"
+
+        obj: BaseTranscriper = cls(
+            metadata_path=str(metadata_path), audio_path=str(audio_path)
+        )
+
+        time_start = time.perf_counter()
+        obj(
+            model_id="fake",
+            model_constructor=FakeModel(inference_rtf=inference_rtf),
+            options=TranscribeOptions(
+                from_sorah=from_sorah,
+                to_sorah=to_sorah,
+                batch_size=batch_size,
+                schedule=schedule,
+                prefetch=prefetch,
+                prefetch_workers=prefetch_workers,
+                progress=False,
+            ),
+            output_dir=str(root),
+            output_filename="bench",
+        )
+        wall_time = time.perf_counter() - time_start
+
+    parts = (to_sorah - from_sorah + 1) * parts_per_sorah
+    return {
+        "commit": _git_commit(),
+        "transcriber": transcriber,
+        "config": {
+            "sorah_range": [from_sorah, to_sorah],
+            "parts_per_sorah": parts_per_sorah,
+            "durations_s": list(durations),
+            "batch_size": batch_size,
+            "schedule": schedule,
+            "prefetch": prefetch,
+            "prefetch_workers": prefetch_workers,
+            "audio_store": audio_store,
+            "inference_rtf": inference_rtf,
+            "seed": seed,
+        },
+        "parts": parts,
+        "audio_s": total_duration,
+        "wall_time_s": wall_time,
+        "parts_per_s": parts / wall_time,
+        "stages": obj.timer.report(),
+    }
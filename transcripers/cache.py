@@ -0,0 +1,209 @@
+from pathlib import Path
+from typing import Any, Final
+from threading import Lock
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from .transcribe import Transcription, hf_model_id
+
+
+DEFAULT_CACHE_DIR: Final[Path] = (
+    Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache"))
+    / "whisper-quran-cli"
+)
+
+
+def file_sha256(path: str | Path, chunk_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        while chunk := file.read(chunk_size):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def hub_revision(repo_id: str) -> str | None:
+    # the commit the local hub cache resolved the id to when the model was
+    # loaded, a new revision under the same id is another model
+    try:
+        from huggingface_hub import constants  # type: ignore
+    except ImportError:
+        return None
+    hub_cache = getattr(constants, "HF_HUB_CACHE", None) or constants.HUGGINGFACE_HUB_CACHE
+    ref = Path(hub_cache) / f"models--{repo_id.replace('/', '--')}" / "refs" / "main"
+    try:
+        return ref.read_text().strip()
+    except OSError:
+        return None
+
+
+# hashing a multi-GB checkpoint or a whole reciter on every run is not free,
+# so digests are memoized by (path, size, mtime) in a `file_hashes` table
+class FileHashes:
+    def __init__(self, connection: sqlite3.Connection, lock: Lock):
+        self._connection = connection
+        self._lock = lock
+        with self._lock, self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS file_hashes ("
+                "path TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL, "
+                "sha256 TEXT NOT NULL)"
+            )
+
+    def __call__(self, path: str | Path) -> str:
+        path = str(Path(path).absolute())
+        stat = os.stat(path)
+
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT sha256 FROM file_hashes WHERE path = ? AND size = ? AND mtime_ns = ?",
+                (path, stat.st_size, stat.st_mtime_ns),
+            ).fetchone()
+        if row is not None:
+            return row[0]
+
+        sha256 = file_sha256(path)
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO file_hashes VALUES (?, ?, ?, ?)",
+                (path, stat.st_size, stat.st_mtime_ns, sha256),
+            )
+        return sha256
+
+
+# sqlite backed store of raw model predictions, evicting the least recently
+# used entries once the stored text exceeds `max_size_bytes`
+class TranscriptionCache:
+    def __init__(self, cache_dir: str | Path, max_size_bytes: int):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_size_bytes = max_size_bytes
+
+        # the prefetch threads look entries up while the main thread stores them
+        self._lock = Lock()
+        self._connection = sqlite3.connect(
+            self.cache_dir / "transcriptions.sqlite3",
+            check_same_thread=False,
+            # --workers processes share the same database
+            timeout=60,
+        )
+        with self._lock, self._connection:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS transcriptions ("
+                "key TEXT PRIMARY KEY, text TEXT NOT NULL, processing_time REAL NOT NULL, "
+                "size INTEGER NOT NULL, last_access REAL NOT NULL, stats TEXT)"
+            )
+            # databases written before the timing breakdown was stored
+            columns = {
+                row[1]
+                for row in self._connection.execute("PRAGMA table_info(transcriptions)")
+            }
+            if "stats" not in columns:
+                self._connection.execute("ALTER TABLE transcriptions ADD COLUMN stats TEXT")
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS transcriptions_last_access "
+                "ON transcriptions (last_access)"
+            )
+            (total_size,) = self._connection.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM transcriptions"
+            ).fetchone()
+        self._total_size: int = total_size
+        self._file_hashes = FileHashes(self._connection, self._lock)
+
+    def file_hash(self, path: str | Path) -> str:
+        return self._file_hashes(path)
+
+    def directory_hash(self, path: str | Path) -> str:
+        # a transformers checkpoint directory: the digests of all of its files
+        # (weights, config, tokenizer), retraining into it changes the key
+        path = Path(path)
+        digest = hashlib.sha256()
+        for file_path in sorted(path.rglob("*")):
+            relative_path = file_path.relative_to(path)
+            if not file_path.is_file() or any(
+                part.startswith(".") for part in relative_path.parts
+            ):
+                continue
+            digest.update(f"{relative_path.as_posix()}\0{self.file_hash(file_path)}\n".encode())
+        return digest.hexdigest()
+
+    def model_key(self, identity: dict[str, Any]) -> str:
+        identity = dict(identity)
+        model = identity["model"]
+        if Path(model).is_file():
+            identity["model"] = f"sha256:{self.file_hash(model)}"
+        elif Path(model).is_dir():
+            identity["model"] = f"sha256-dir:{self.directory_hash(model)}"
+        elif identity.get("backend") == "TransformersWhisperModel":
+            revision = hub_revision(hf_model_id(model))
+            if revision is not None:
+                identity["model"] = f"{model}@{revision}"
+        return json.dumps(identity, sort_keys=True, ensure_ascii=False)
+
+    def key(self, model_key: str, audio_key: str) -> str:
+        return hashlib.sha256(f"{model_key}\0{audio_key}".encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Transcription | None:
+        with self._lock, self._connection:
+            row = self._connection.execute(
+                "SELECT text, processing_time, stats FROM transcriptions WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if row is None:
+                return None
+
+            self._connection.execute(
+                "UPDATE transcriptions SET last_access = ? WHERE key = ?",
+                (time.time(), key),
+            )
+        text, processing_time, stats = row
+        if stats is None:
+            return Transcription(text=text, processing_time=processing_time)
+        stats = json.loads(stats)
+        # stored before the field was named as the estimate it is
+        if "accepted_draft_tokens" in stats:
+            stats["estimated_accepted_draft_tokens"] = stats.pop("accepted_draft_tokens")
+        return Transcription(text=text, **stats)
+
+    def put(self, key: str, transcription: Transcription) -> None:
+        stats = json.dumps(transcription.stats())
+        # word timestamps of a long-form sorah outweigh its text
+        size = len(key) + len(transcription.text.encode("utf-8")) + len(stats)
+
+        with self._lock, self._connection:
+            previous = self._connection.execute(
+                "SELECT size FROM transcriptions WHERE key = ?", (key,)
+            ).fetchone()
+            self._connection.execute(
+                "INSERT OR REPLACE INTO transcriptions "
+                "(key, text, processing_time, size, last_access, stats) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    key,
+                    transcription.text,
+                    transcription.processing_time,
+                    size,
+                    time.time(),
+                    stats,
+                ),
+            )
+            self._total_size += size - (previous[0] if previous else 0)
+
+            while self._total_size > self.max_size_bytes:
+                evicted = self._connection.execute(
+                    "SELECT key, size FROM transcriptions ORDER BY last_access LIMIT 64"
+                ).fetchall()
+                if len(evicted) == 0:
+                    break
+
+                self._connection.executemany(
+                    "DELETE FROM transcriptions WHERE key = ?",
+                    [(evicted_key,) for evicted_key, _ in evicted],
+                )
+                self._total_size -= sum(evicted_size for _, evicted_size in evicted)
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
@@ -0,0 +1,221 @@
+from pathlib import Path
+from typing import Iterable, Iterator, Any
+from pydantic import RootModel
+from sys import stderr
+import json
+import os
+from .output_types import *  # type: ignore
+
+
+# raised when --resume would mix the results of different settings in one output
+class JournalMismatchError(ValueError):
+    pass
+
+
+# append-only JSONL log of every part result, written as soon as it is computed
+# so an interrupted run loses at most the line that was being written. Its first
+# record is the header: the settings the results depend on
+class Journal:
+    def __init__(
+        self,
+        path: str | Path,
+        resume: bool = False,
+        header: dict[str, Any] | None = None,
+    ):
+        self.path = Path(path)
+        if resume:
+            _drop_partial_line(self.path)
+        self.file = open(self.path, "a" if resume else "w", encoding="utf-8")
+        if header is not None and self.file.tell() == 0:
+            self._write({"header": header})
+
+    def done(self) -> set[tuple[int, int]]:
+        done: set[tuple[int, int]] = set()
+        for record in read_journal(self.path):
+            key = (record["sorah_num"], record.get("part", record.get("error"))["number"])
+            if "part" in record:
+                done.add(key)
+            else:
+                done.discard(key)
+        return done
+
+    def _write(self, record: dict[str, Any]) -> None:
+        self.file.write(json.dumps(record, ensure_ascii=False))
+        self.file.write("\n")
+        self.file.flush()
+
+    def write_part(self, sorah_num: int, entry: OutputPartEntry) -> None:
+        self._write(
+            {
+                "sorah_num": sorah_num,
+                "part": RootModel[OutputPartEntry](entry).model_dump(),
+            }
+        )
+
+    def write_error(self, sorah_num: int, entry: OutputPartErrorEntry) -> None:
+        self._write(
+            {
+                "sorah_num": sorah_num,
+                "error": RootModel[OutputPartErrorEntry](entry).model_dump(),
+            }
+        )
+
+    def close(self) -> None:
+        self.file.close()
+
+    def __enter__(self) -> "Journal":
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+
+# every worker process of a --workers run streams into its own shard next to
+# the main journal, the shards are appended to it once the workers are done
+def journal_shard_path(path: str | Path, index: int) -> str:
+    return f"{path}.{index}"
+
+
+def _journal_shards(path: str | Path) -> list[Path]:
+    path = Path(path)
+    shards = [
+        shard
+        for shard in path.parent.glob(f"{path.name}.*")
+        if shard.suffix[1:].isdecimal()
+    ]
+    return sorted(shards, key=lambda shard: int(shard.suffix[1:]))
+
+
+def merge_journal_shards(path: str | Path) -> None:
+    shards = _journal_shards(path)
+    if len(shards) == 0:
+        return
+
+    _drop_partial_line(path)
+    with open(path, "a", encoding="utf-8") as journal_file:
+        for shard in shards:
+            for record in read_journal(shard):
+                journal_file.write(json.dumps(record, ensure_ascii=False))
+                journal_file.write("\n")
+            journal_file.flush()
+            shard.unlink()
+
+
+def remove_journal_shards(path: str | Path) -> None:
+    for shard in _journal_shards(path):
+        shard.unlink()
+
+
+def _drop_partial_line(path: str | Path) -> None:
+    # a run killed mid-write leaves a line without its newline, a record
+    # appended after it would be glued onto it and both would be lost
+    path = Path(path)
+    if not path.exists():
+        return
+
+    with open(path, "rb+") as file:
+        end = file.seek(0, os.SEEK_END)
+        if end == 0:
+            return
+        file.seek(end - 1)
+        if file.read(1) == b"\n":
+            return
+
+        while end > 0:
+            start = max(0, end - 65536)
+            file.seek(start)
+            newline = file.read(end - start).rfind(b"\n")
+            if newline >= 0:
+                file.truncate(start + newline + 1)
+                break
+            end = start
+        else:
+            file.truncate(0)
+    print(f"{path}: dropped the partial last line", file=stderr)
+
+
+def _read_records(path: str | Path) -> Iterator[dict[str, Any]]:
+    if not Path(path).exists():
+        return
+
+    with open(path, "r", encoding="utf-8") as file:
+        for line_num, line in enumerate(file, start=1):
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                # most likely the tail of a run that was killed mid-write
+                print(f"{path}:{line_num}: skipping malformed journal line", file=stderr)
+
+
+def read_journal(path: str | Path) -> Iterator[dict[str, Any]]:
+    for record in _read_records(path):
+        if "header" not in record:
+            yield record
+
+
+def read_journal_header(path: str | Path) -> dict[str, Any] | None:
+    # always the first record
+    record = next(_read_records(path), None)
+    return record.get("header") if record is not None else None
+
+
+def check_journal_header(path: str | Path, header: dict[str, Any]) -> None:
+    found = read_journal_header(path)
+    if found is None:
+        # a new journal, or one written before journals had a header
+        return
+
+    # compared the way it was stored (tuples come back as lists)
+    header = json.loads(json.dumps(header, ensure_ascii=False))
+    differences = [
+        f"{key}: {found.get(key)!r} != {header.get(key)!r}"
+        for key in sorted(found.keys() | header.keys())
+        if found.get(key) != header.get(key)
+    ]
+    if len(differences) > 0:
+        raise JournalMismatchError(
+            f"{path} was written with other settings, --resume would mix their results "
+            f"(journal != this run: {', '.join(differences)})"
+        )
+
+
+def fold_journal(
+    paths: Iterable[str | Path], from_sorah: int = 1, to_sorah: int = 114
+) -> tuple[TotalEntry, list[OutputSorahErrorsEntry]]:
+    # the last record of a part wins, so a part that failed and succeeded on
+    # --resume only shows up as a success
+    records: dict[int, dict[int, dict[str, Any]]] = {}
+    for path in paths:
+        for record in read_journal(path):
+            sorah_num = record["sorah_num"]
+            if not from_sorah <= sorah_num <= to_sorah:
+                continue
+            number = record.get("part", record.get("error"))["number"]
+            records.setdefault(sorah_num, {})[number] = record
+
+    total_entry = TotalEntry(sorahs=[])
+    sorahs_errors: list[OutputSorahErrorsEntry] = []
+
+    # only the sorahs that were transcribed, the ones the metadata has no parts
+    # for are skipped rather than written out empty
+    for sorah_num in sorted(records):
+        sorah_entry = OutputSorahEntry(sorah_num=sorah_num, parts=[])
+        curr_sorah_errors = OutputSorahErrorsEntry(sorah_num=sorah_num, parts=[])
+
+        sorah_records = records[sorah_num]
+        for number in sorted(sorah_records):
+            record = sorah_records[number]
+            if "part" in record:
+                sorah_entry.add_part(
+                    RootModel[OutputPartEntry].model_validate(record["part"]).root
+                )
+            else:
+                curr_sorah_errors.parts.append(
+                    RootModel[OutputPartErrorEntry].model_validate(record["error"]).root
+                )
+
+        total_entry.add_sorah(sorah_entry)
+        if len(curr_sorah_errors.parts) > 0:
+            sorahs_errors.append(curr_sorah_errors)
+
+    return total_entry, sorahs_errors
@@ -0,0 +1,48 @@
+from typing import TYPE_CHECKING, Sequence
+import numpy as np
+
+if TYPE_CHECKING:
+    from .base_transcriper import PartTask
+
+
+def part_boundaries_ms(parts: Sequence["PartTask"]) -> np.ndarray:
+    # where one part hands over to the next on the sorah timeline: halfway
+    # through the pause between the last word of a part and the first word of
+    # the next one (from_ms/to_ms when a part has no word timings)
+    starts = np.array(
+        [
+            part.from_ms + part.speech_ms[0] if part.speech_ms is not None else part.from_ms  # type: ignore
+            for part in parts
+        ]
+    )
+    ends = np.array(
+        [
+            part.from_ms + part.speech_ms[1] if part.speech_ms is not None else part.to_ms  # type: ignore
+            for part in parts
+        ]
+    )
+    return (ends[:-1] + starts[1:]) / 2
+
+
+# predicted (start_s, end_s, word) of a whole sorah -> the text of every part,
+# each word goes to the part its midpoint falls into
+def assign_words(
+    words: Sequence[Sequence], parts: Sequence["PartTask"]
+) -> list[str]:
+    if len(words) == 0:
+        return ["" for _ in parts]
+
+    midpoints_ms = np.array(
+        [
+            # transformers leaves the end of the very last word open
+            (start + (end if end is not None else start)) / 2 * 1000
+            for start, end, _ in words
+        ]
+    )
+    indices = np.searchsorted(part_boundaries_ms(parts), midpoints_ms, side="right")
+
+    texts: list[list[str]] = [[] for _ in parts]
+    for index, (_, _, word) in zip(indices, words):
+        texts[index].append(word)
+    # whisper words carry their leading space
+    return [" ".join("".join(text).split()) for text in texts]
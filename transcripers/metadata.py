@@ -0,0 +1,110 @@
+from pathlib import Path
+from sys import stderr
+from typing import Any, Final, Iterable
+import json
+import os
+
+
+INDEX_SUFFIX: Final[str] = ".index.json"
+INDEX_VERSION: Final[int] = 1
+
+_WHITESPACE: Final[str] = " \t\n\r"
+
+
+def _build_json_index(text: str) -> dict[str, list[int]]:
+    # byte range of every top-level value, the values themselves are only
+    # scanned by the C json decoder, never validated
+    decoder = json.JSONDecoder()
+    index: dict[str, list[int]] = {}
+
+    def skip(pos: int) -> int:
+        while pos < len(text) and text[pos] in _WHITESPACE:
+            pos += 1
+        return pos
+
+    pos = skip(0)
+    if text[pos : pos + 1] != "{":
+        raise ValueError("metadata must be a JSON object keyed by sorah number")
+    pos = skip(pos + 1)
+
+    byte_pos = len(text[:pos].encode("utf-8"))
+    while text[pos : pos + 1] != "}":
+        key, key_end = decoder.raw_decode(text, pos)
+        value_start = skip(skip(key_end) + 1)  # past the ':'
+        _, value_end = decoder.raw_decode(text, value_start)
+
+        value_start_byte = byte_pos + len(text[pos:value_start].encode("utf-8"))
+        value_end_byte = value_start_byte + len(
+            text[value_start:value_end].encode("utf-8")
+        )
+        index[key] = [value_start_byte, value_end_byte - value_start_byte]
+
+        next_pos = skip(value_end)
+        if text[next_pos : next_pos + 1] == ",":
+            next_pos = skip(next_pos + 1)
+        byte_pos = value_end_byte + len(text[value_end:next_pos].encode("utf-8"))
+        pos = next_pos
+
+    return index
+
+
+# sorah -> byte range of its value in a large JSON metadata file, so a run over
+# a few sorahs only reads and validates those. The index is built with one pass
+# over the file and kept in `<metadata>.index.json`, rebuilt whenever the
+# metadata file changes
+class JSONMetadataIndex:
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.index_path = self.path.with_name(self.path.name + INDEX_SUFFIX)
+        self.sorahs = self._load_index()
+
+    def _stamp(self) -> dict[str, int]:
+        stat = os.stat(self.path)
+        return {
+            "version": INDEX_VERSION,
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+        }
+
+    def _load_index(self) -> dict[str, list[int]]:
+        stamp = self._stamp()
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as file:
+                index = json.load(file)
+            if index["stamp"] == stamp:
+                return index["sorahs"]
+        except (OSError, ValueError, KeyError):
+            pass
+
+        # newline="": the ranges are byte offsets, \r\n must stay two bytes
+        with open(self.path, "r", encoding="utf-8", newline="") as file:
+            sorahs = _build_json_index(file.read())
+
+        try:
+            index_tmp_path = self.index_path.with_name(self.index_path.name + ".tmp")
+            with open(index_tmp_path, "w", encoding="utf-8") as file:
+                json.dump({"stamp": stamp, "sorahs": sorahs}, file)
+            index_tmp_path.replace(self.index_path)
+        except OSError:
+            # read-only dataset directory, the index only lives for this run
+            pass
+
+        return sorahs
+
+    def __contains__(self, sorah_num: int) -> bool:
+        return str(sorah_num) in self.sorahs
+
+    def load(self, sorah_num: int) -> Any:
+        offset, length = self.sorahs[str(sorah_num)]
+        with open(self.path, "rb") as file:
+            file.seek(offset)
+            return json.loads(file.read(length))
+
+
+def warn_missing_sorahs(metadata_path: Path, missing: Iterable[int]) -> None:
+    missing = list(missing)
+    if len(missing) > 0:
+        print(
+            f"{metadata_path}: no metadata for sorahs {', '.join(map(str, missing))}, skipping them",
+            file=stderr,
+        )
@@ -0,0 +1,94 @@
+from typing import Final, Iterable
+import re
+
+
+def _chars(first: int, last: int) -> str:
+    return "".join(map(chr, range(first, last + 1)))
+
+
+# fathatan .. sukun, the eight marks remove_diacritics always stripped
+HARAKAT: Final[str] = _chars(0x064B, 0x0652)
+TATWEEL: Final[str] = "ـ"
+LETTERS: Final[dict[str, str]] = {
+    "أ": "ا",
+    "إ": "ا",
+    "آ": "ا",
+    "ٱ": "ا",
+    "ى": "ي",
+    "ة": "ه",
+    "ؤ": "و",
+    "ئ": "ي",
+}
+# small high letters and signs (U+0610..U+061A), extended harakat such as
+# maddah and hamza above/below (U+0653..U+065F), the superscript (dagger) alef,
+# and the Quranic annotation block: small high ligatures, waqf signs, end of
+# ayah, rub el hizb, sajdah (U+06D6..U+06ED)
+QURANIC_MARKS: Final[str] = (
+    _chars(0x0610, 0x061A) + _chars(0x0653, 0x065F) + "ٰ" + _chars(0x06D6, 0x06ED)
+)
+
+# every profile includes the ones before it
+PROFILES: Final[dict[str, dict[int, str | None]]] = {}
+PROFILES["none"] = {}
+PROFILES["harakat"] = str.maketrans("", "", HARAKAT)
+PROFILES["tatweel"] = {**PROFILES["harakat"], **str.maketrans("", "", TATWEEL)}
+PROFILES["letters"] = {**PROFILES["tatweel"], **str.maketrans(LETTERS)}
+PROFILES["quranic"] = {**PROFILES["letters"], **str.maketrans("", "", QURANIC_MARKS)}
+
+DEFAULT_PROFILE: Final[str] = "harakat"
+
+# joins a batch so every pass runs once over all of it, it is in none of the
+# tables so it survives the normalization untouched
+_BATCH_SEPARATOR: Final[str] = "\x00"
+
+_HARAKAT_RE: Final[re.Pattern[str]] = re.compile(f"[{HARAKAT}]")
+_QURANIC_MARKS_RE: Final[re.Pattern[str]] = re.compile(f"[{QURANIC_MARKS}]")
+
+
+def has_diacritics(text: str) -> bool:
+    return _HARAKAT_RE.search(text) is not None
+
+
+class Normalizer:
+    def __init__(self, profile: str = DEFAULT_PROFILE):
+        if profile not in PROFILES:
+            raise ValueError(
+                f"unknown normalization profile {profile!r} (expected one of {', '.join(PROFILES)})"
+            )
+        self.profile = profile
+        self.table = PROFILES[profile]
+        # str.translate looks every character up in the table, a str.replace
+        # per entry is faster for the few harakat and letters. The Quranic
+        # marks are too many for that and are removed by one regex pass
+        self.marks_re = _QURANIC_MARKS_RE if profile == "quranic" else None
+        self.replacements = [
+            (chr(char), replacement or "")
+            for char, replacement in self.table.items()
+            if self.marks_re is None or chr(char) not in QURANIC_MARKS
+        ]
+        # waqf signs are written as standalone words in the Uthmani script,
+        # removing them leaves double spaces behind
+        self.collapse_spaces = profile == "quranic"
+
+    def _strip(self, text: str) -> str:
+        if self.marks_re is not None:
+            text = self.marks_re.sub("", text)
+        for char, replacement in self.replacements:
+            text = text.replace(char, replacement)
+        return text
+
+    def __call__(self, text: str) -> str:
+        text = self._strip(text)
+        if self.collapse_spaces:
+            text = " ".join(text.split())
+        return text
+
+    def normalize_batch(self, texts: Iterable[str]) -> list[str]:
+        texts = list(texts)
+        if len(texts) == 0 or any(_BATCH_SEPARATOR in text for text in texts):
+            return list(map(self, texts))
+
+        normalized = self._strip(_BATCH_SEPARATOR.join(texts)).split(_BATCH_SEPARATOR)
+        if self.collapse_spaces:
+            normalized = [" ".join(text.split()) for text in normalized]
+        return normalized
@@ -1,7 +1,23 @@
 from pydantic.dataclasses import dataclass  # type: ignore
 from pydantic import computed_field  # type: ignore
-from typing import Iterable
-from sys import stderr
+from typing import Any
+import bisect
+import heapq
+from .utils import percentile
+
+# what `from .output_types import *` hands out, pydantic's dataclass (and the
+# typing names) must not shadow the importer's own
+__all__ = [
+    "WERInfo",
+    "Benchmark",
+    "BenchmarkSummary",
+    "OutputPartEntry",
+    "RunningTotals",
+    "OutputSorahEntry",
+    "TotalEntry",
+    "OutputPartErrorEntry",
+    "OutputSorahErrorsEntry",
+]
 
 
 @dataclass
@@ -10,36 +26,68 @@ class WERInfo:
     deletions: int
     hits: int
     substitutions: int
-    wer: float
-
+    # None when there were no reference words to compare against
+    wer: float | None
 
-def merge_wer_info(entries: Iterable[WERInfo]) -> WERInfo:
-    insertions = 0
-    deletions = 0
-    hits = 0
-    substitutions = 0
 
-    for entry in entries:
-        insertions += entry.insertions
-        deletions += entry.deletions
-        hits += entry.hits
-        substitutions += entry.substitutions
+@dataclass
+class Benchmark:
+    duration_s: float
+    processing_time_s: float
+    # breakdown of the work done for this part, None when it is not known
+    # (cached predictions, backends that do not report it, older journals)
+    audio_load_time_s: float | None = None
+    feature_extraction_time_s: float | None = None
+    inference_time_s: float | None = None
+    generated_tokens: int | None = None
+    decode_attempts: int | None = None
+    # speculative decoding (--draft-model), the accepted tokens are estimated
+    # from the decoder pass counts
+    draft_tokens: int | None = None
+    estimated_accepted_draft_tokens: int | None = None
+    # leading/trailing silence cut by --trim-silence before inference
+    trimmed_s: float | None = None
+    # silence the backend padded the audio of the part with to fill its 30s
+    # windows, and decoder steps the finished output waited for the rest of its
+    # batch (None when it was not transcribed in this run)
+    padding_s: float | None = None
+    idle_decoder_steps: int | None = None
+    # process peaks at the time the part was finished
+    peak_rss_mb: float | None = None
+    peak_allocated_mb: float | None = None
 
-    wer = (insertions + deletions + substitutions) / (deletions + substitutions + hits)
+    @computed_field
+    def tokens_per_s(self) -> float | None:
+        if self.generated_tokens is None or self.processing_time_s <= 0:
+            return None
+        return self.generated_tokens / self.processing_time_s
 
-    return WERInfo(
-        insertions=insertions,
-        deletions=deletions,
-        hits=hits,
-        substitutions=substitutions,
-        wer=wer,
-    )
+    @computed_field
+    def estimated_draft_acceptance_rate(self) -> float | None:
+        if not self.draft_tokens or self.estimated_accepted_draft_tokens is None:
+            return None
+        return self.estimated_accepted_draft_tokens / self.draft_tokens
 
 
 @dataclass
-class Benchmark:
-    duration_s: float
-    processing_time_s: float
+class BenchmarkSummary:
+    parts: int
+    total_audio_s: float
+    total_compute_s: float
+    # compute seconds per audio second, below 1 is faster than real time
+    rtf: float | None
+    p50_latency_s: float | None
+    p95_latency_s: float | None
+    p99_latency_s: float | None
+    total_trimmed_s: float = 0.0
+    # parts that needed more than one decoding pass
+    fallback_parts: int = 0
+    total_padding_s: float = 0.0
+    # audio seconds per audio + padding seconds the encoder saw
+    padding_efficiency: float | None = None
+    total_idle_decoder_steps: int = 0
+    # generated tokens per generated tokens + idle decoder steps
+    decoder_efficiency: float | None = None
 
 
 @dataclass
@@ -49,35 +97,163 @@ class OutputPartEntry:
     ref_text: str
     wer_info: WERInfo
     bench_data: Benchmark
+    # model output and reference before normalization, so `main.py rescore` can
+    # score them again with another profile (None in results of older versions)
+    raw_pred_text: str | None = None
+    raw_ref_text: str | None = None
+
+
+# running sums of the parts added so far, sorah and total aggregates are read
+# from them in O(1) instead of being merged again on every access
+class RunningTotals:
+    def __init__(self):
+        self.insertions = 0
+        self.deletions = 0
+        self.hits = 0
+        self.substitutions = 0
+        self.total_audio_s = 0.0
+        self.total_compute_s = 0.0
+        self.total_trimmed_s = 0.0
+        self.fallback_parts = 0
+        # model input and padding seconds, generated tokens and idle decoder
+        # steps of the parts transcribed in this run
+        self.total_input_s = 0.0
+        self.total_padding_s = 0.0
+        self.total_decoded_tokens = 0
+        self.total_idle_decoder_steps = 0
+        # kept sorted for the latency percentiles
+        self.latencies: list[float] = []
+
+    def add(self, part: OutputPartEntry) -> None:
+        self.insertions += part.wer_info.insertions
+        self.deletions += part.wer_info.deletions
+        self.hits += part.wer_info.hits
+        self.substitutions += part.wer_info.substitutions
+        self.total_audio_s += part.bench_data.duration_s
+        self.total_compute_s += part.bench_data.processing_time_s
+        self.total_trimmed_s += part.bench_data.trimmed_s or 0.0
+        self.fallback_parts += (part.bench_data.decode_attempts or 0) > 1
+        if part.bench_data.padding_s is not None:
+            self.total_input_s += part.bench_data.duration_s - (
+                part.bench_data.trimmed_s or 0.0
+            )
+            self.total_padding_s += part.bench_data.padding_s
+        if (
+            part.bench_data.idle_decoder_steps is not None
+            and part.bench_data.generated_tokens is not None
+        ):
+            self.total_decoded_tokens += part.bench_data.generated_tokens
+            self.total_idle_decoder_steps += part.bench_data.idle_decoder_steps
+        bisect.insort(self.latencies, part.bench_data.processing_time_s)
 
+    def merge(self, other: "RunningTotals") -> None:
+        self.insertions += other.insertions
+        self.deletions += other.deletions
+        self.hits += other.hits
+        self.substitutions += other.substitutions
+        self.total_audio_s += other.total_audio_s
+        self.total_compute_s += other.total_compute_s
+        self.total_trimmed_s += other.total_trimmed_s
+        self.fallback_parts += other.fallback_parts
+        self.total_input_s += other.total_input_s
+        self.total_padding_s += other.total_padding_s
+        self.total_decoded_tokens += other.total_decoded_tokens
+        self.total_idle_decoder_steps += other.total_idle_decoder_steps
+        self.latencies = list(heapq.merge(self.latencies, other.latencies))
 
+    @property
+    def wer(self) -> float | None:
+        reference_words = self.deletions + self.substitutions + self.hits
+        if reference_words == 0:
+            return None
+        return (self.insertions + self.deletions + self.substitutions) / reference_words
+
+    @property
+    def rtf(self) -> float | None:
+        if self.total_audio_s <= 0:
+            return None
+        return self.total_compute_s / self.total_audio_s
+
+    def wer_info(self) -> WERInfo:
+        return WERInfo(
+            insertions=self.insertions,
+            deletions=self.deletions,
+            hits=self.hits,
+            substitutions=self.substitutions,
+            wer=self.wer,
+        )
+
+    def bench_info(self) -> BenchmarkSummary:
+        return BenchmarkSummary(
+            parts=len(self.latencies),
+            total_audio_s=self.total_audio_s,
+            total_compute_s=self.total_compute_s,
+            rtf=self.rtf,
+            p50_latency_s=percentile(self.latencies, 50),
+            p95_latency_s=percentile(self.latencies, 95),
+            p99_latency_s=percentile(self.latencies, 99),
+            total_trimmed_s=self.total_trimmed_s,
+            fallback_parts=self.fallback_parts,
+            total_padding_s=self.total_padding_s,
+            padding_efficiency=self.total_input_s
+            / (self.total_input_s + self.total_padding_s)
+            if self.total_input_s > 0
+            else None,
+            total_idle_decoder_steps=self.total_idle_decoder_steps,
+            decoder_efficiency=self.total_decoded_tokens
+            / (self.total_decoded_tokens + self.total_idle_decoder_steps)
+            if self.total_decoded_tokens > 0
+            else None,
+        )
+
+
+# parts must be added with add_part (not parts.append) to keep the totals current
 @dataclass
 class OutputSorahEntry:
     sorah_num: int
     parts: list[OutputPartEntry]
 
+    def __post_init__(self):
+        self.totals = RunningTotals()
+        for part in self.parts:
+            self.totals.add(part)
+
+    def add_part(self, part: OutputPartEntry) -> None:
+        self.parts.append(part)
+        self.totals.add(part)
+
     @computed_field
     def wer_info(self) -> WERInfo:
-        try:
-            wer_info = merge_wer_info(map(lambda part: part.wer_info, self.parts))  # type: ignore
-            return wer_info
-        except Exception as e:
-            print(e, file=stderr)
-        return WERInfo(insertions=0, deletions=0, hits=0, substitutions=0, wer=1)
+        return self.totals.wer_info()
+
+    @computed_field
+    def bench_info(self) -> BenchmarkSummary:
+        return self.totals.bench_info()
 
 
+# sorahs are added with add_sorah once all of their parts are in
 @dataclass
 class TotalEntry:
     sorahs: list[OutputSorahEntry]
+    # backend, model and options (e.g. precision) the predictions came from
+    model_info: dict[str, Any] | None = None
+
+    def __post_init__(self):
+        self.totals = RunningTotals()
+        for sorah in self.sorahs:
+            self.totals.merge(sorah.totals)
+
+    def add_sorah(self, sorah: OutputSorahEntry) -> None:
+        self.sorahs.append(sorah)
+        self.totals.merge(sorah.totals)
 
     @computed_field
     def wer_info(self) -> WERInfo:
-        try:
-            wer_info = merge_wer_info(map(lambda sorah: sorah.wer_info, self.sorahs))  # type: ignore
-            return wer_info
-        except Exception as e:
-            print(e, file=stderr)
-        return WERInfo(insertions=0, deletions=0, hits=0, substitutions=0, wer=1)
+        return self.totals.wer_info()
+
+    @computed_field
+    def bench_info(self) -> BenchmarkSummary:
+        return self.totals.bench_info()
 
 
 @dataclass
@@ -1,12 +1,9 @@
 from pydantic import BaseModel, RootModel, computed_field
 from enum import Enum
-import json
-from pathlib import Path
-from jiwer import process_words  # type: ignore
-from .output_types import *
-from .utils import path_join, DEVICE, count_with_diacritics, Counter
-from .base_transcriper import BaseTranscriper
-from .transcribe import Model
+from typing import Iterator
+from .utils import path_join
+from .base_transcriper import BaseTranscriper, PartTask
+from .metadata import JSONMetadataIndex, warn_missing_sorahs
 
 
 class Waqf(str, Enum):
@@ -65,103 +62,103 @@ class Sorah(RootModel):
     root: list[Part]
 
 
-class SheikhInfo(RootModel):
-    root: dict[str, Sorah]
-
-
-def load_sheikh_info(path: Path) -> SheikhInfo:
-    with open(path, "r", encoding="utf-8") as file:
-        _json = json.load(file)
-
-    return SheikhInfo.model_validate(_json)
-
-
 def sorah_part_format(sorah_num: int, part_num: int, ext: str = "mp3") -> str:
     return f"{sorah_num:03}-{part_num:06}.{ext}"
 
 
-class QuranComTranscriper(BaseTranscriper):
-    def __init__(self, metadata_path: str, audio_path: str):
-        super().__init__(metadata_path=metadata_path, audio_path=audio_path)
+def sorah_format(sorah_num: int, ext: str = "mp3") -> str:
+    return f"{sorah_num:03}.{ext}"
+
 
-    def transcribe(
+class QuranComTranscriper(BaseTranscriper):
+    def __init__(
         self,
-        *,
-        model_id: str,
-        model_constructor: Model,
-        normalize_text: bool = True,
-        from_sorah: int = 1,
-        to_sorah: int = 114,
-        device: str = DEVICE,
-    ) -> tuple[TotalEntry, list[OutputSorahErrorsEntry]]:
-        sheikh_info = load_sheikh_info(self.metadata_path)
-        total_entry = TotalEntry(sorahs=[])
-        sorahs_errors: list[OutputSorahErrorsEntry] = []
-
-        total_counter = Counter()
-        with_diacritics_counter = Counter()
-
-        model = model_constructor.construct_model(
-            model_id,
-            device=device,
-            fn=count_with_diacritics(total_counter, with_diacritics_counter),
+        metadata_path: str,
+        audio_path: str,
+        sorah_audio: bool = False,
+        long_form: bool = False,
+    ):
+        super().__init__(metadata_path=metadata_path, audio_path=audio_path)
+        # every sorah recording is transcribed in one long-form pass with word
+        # timestamps, the words are assigned back to the parts by their timings
+        self.long_form = long_form
+        self.word_timestamps = long_form
+        # one recording per sorah, parts are cut out of it by Part.from_ms/to_ms
+        # instead of reading a pre-cut file per part
+        self.sorah_audio = sorah_audio or long_form
+
+    def load_tasks(self, from_sorah: int, to_sorah: int) -> Iterator[PartTask]:
+        with self.timer("metadata"):
+            metadata = JSONMetadataIndex(self.metadata_path)
+            sorah_nums = [
+                sorah_num
+                for sorah_num in range(from_sorah, to_sorah + 1)
+                if sorah_num in metadata
+            ]
+        warn_missing_sorahs(
+            self.metadata_path,
+            (
+                sorah_num
+                for sorah_num in range(from_sorah, to_sorah + 1)
+                if sorah_num not in metadata
+            ),
         )
 
-        for sorah_num in range(from_sorah, to_sorah + 1):
-            sorah_num_str = str(sorah_num)
-            sorah_entry = OutputSorahEntry(sorah_num=sorah_num, parts=[])
-            curr_sorah_errors: OutputSorahErrorsEntry = OutputSorahErrorsEntry(
-                sorah_num=sorah_num, parts=[]
+        for sorah_num in sorah_nums:
+            # only the sorahs in the range are ever parsed and validated
+            with self.timer("metadata"):
+                sorah = Sorah.model_validate(metadata.load(sorah_num))
+
+            if not self.long_form:
+                yield from self._part_tasks(sorah_num, sorah)
+                continue
+
+            parts = list(self._part_tasks(sorah_num, sorah))
+            if len(parts) == 0:
+                continue
+            # number 0 never reaches the output, only its parts do
+            yield PartTask(
+                sorah_num=sorah_num,
+                number=0,
+                audio_file_path=parts[0].audio_file_path,
+                ref_text=" ".join(part.ref_text for part in parts),
+                duration_s=max(part.to_ms for part in parts) / 1000,  # type: ignore
+                parts=parts,
             )
 
-            for part in sheikh_info.root[sorah_num_str].root:
-                audio_file_path = path_join(
-                    self.audio_path, sorah_part_format(sorah_num, part.number)
-                )
-
-                duration = part.duration / 1000  # type: ignore
-
-                try:
-                    prediction_text, processing_time = model(
-                        audio_file_path, normalize_text=normalize_text
-                    )
-                except Exception as e:
-                    curr_sorah_errors.parts.append(
-                        OutputPartErrorEntry(number=part.number, error_msg=str(e))
-                    )
-                    continue
-
-                word_output = process_words(
-                    hypothesis=prediction_text, reference=part.clear_text  # type: ignore
+    def _part_tasks(self, sorah_num: int, sorah: Sorah) -> Iterator[PartTask]:
+        for part in sorah.root:
+            # the audio of a part starts at part.from_ms in both layouts
+            speech_ms = (
+                (
+                    part.segments[0].start_ms - part.from_ms,
+                    part.segments[-1].end_ms - part.from_ms,
                 )
-
-                part_entry = OutputPartEntry(
+                if len(part.segments) > 0
+                else None
+            )
+            if self.sorah_audio:
+                yield PartTask(
+                    sorah_num=sorah_num,
                     number=part.number,
-                    pred_text=prediction_text,  # type: ignore
+                    audio_file_path=path_join(self.audio_path, sorah_format(sorah_num)),
                     ref_text=part.clear_text,  # type: ignore
-                    wer_info=WERInfo(
-                        insertions=word_output.insertions,
-                        deletions=word_output.deletions,
-                        hits=word_output.hits,
-                        substitutions=word_output.substitutions,
-                        wer=word_output.wer,
-                    ),
-                    bench_data=Benchmark(
-                        duration_s=duration, processing_time_s=processing_time
-                    ),
+                    duration_s=part.duration / 1000,  # type: ignore
+                    from_ms=part.from_ms,
+                    to_ms=part.to_ms,
+                    speech_ms=speech_ms,
                 )
+                continue
 
-                sorah_entry.parts.append(part_entry)
-
-            total_entry.sorahs.append(sorah_entry)
-
-            if len(curr_sorah_errors.parts) > 0:
-                sorahs_errors.append(curr_sorah_errors)
-
-        print(f"Total count: {total_counter.current_value()}")
-        print(f"With diacritics count: {with_diacritics_counter.current_value()}")
-        print(
-            f"Percentage of with diacritics to total count: {with_diacritics_counter.current_value() / total_counter.current_value() * 100}%"
-        )
+            audio_file_path = path_join(
+                self.audio_path, sorah_part_format(sorah_num, part.number)
+            )
 
-        return total_entry, sorahs_errors
+            yield PartTask(
+                sorah_num=sorah_num,
+                number=part.number,
+                audio_file_path=audio_file_path,
+                ref_text=part.clear_text,  # type: ignore
+                duration_s=part.duration / 1000,  # type: ignore
+                speech_ms=speech_ms,
+            )
@@ -0,0 +1,104 @@
+from pathlib import Path
+from typing import Iterator
+import json
+from pydantic import RootModel
+from .output_types import (
+    OutputPartEntry,
+    OutputPartErrorEntry,
+    OutputSorahEntry,
+    OutputSorahErrorsEntry,
+    TotalEntry,
+    WERInfo,
+)
+from .normalization import Normalizer, has_diacritics
+from .scoring import ScoringPool
+from .utils import batched
+
+
+RESCORE_BATCH_SIZE = 512
+
+
+def load_result(path: str | Path) -> TotalEntry:
+    with open(path, "r", encoding="utf-8") as file:
+        return RootModel[TotalEntry].model_validate(json.load(file)).root
+
+
+def _raw_texts(
+    sorah_num: int,
+    part: OutputPartEntry,
+    references: dict[tuple[int, int], str] | None,
+) -> tuple[str, str]:
+    # results written before the raw texts were kept only have the normalized
+    # ones, which are still correct input for a profile that includes theirs
+    prediction = part.raw_pred_text if part.raw_pred_text is not None else part.pred_text
+    reference = part.raw_ref_text if part.raw_ref_text is not None else part.ref_text
+    if references is not None:
+        reference = references.get((sorah_num, part.number), reference)
+    return prediction, reference
+
+
+# recomputes every WERInfo and aggregate of a result file from the stored model
+# output, with another normalization profile and/or updated references, and
+# without running the model. Parts that cannot be scored go to the errors, the
+# way generate reports them. Returns (total, errors, parts, parts with diacritics)
+def rescore(
+    total_entry: TotalEntry,
+    normalization: str,
+    references: dict[tuple[int, int], str] | None = None,
+    workers: int = 1,
+) -> tuple[TotalEntry, list[OutputSorahErrorsEntry], int, int]:
+    normalizer = Normalizer(normalization)
+    parts = [
+        (sorah.sorah_num, part) for sorah in total_entry.sorahs for part in sorah.parts
+    ]
+    raw_texts = [_raw_texts(sorah_num, part, references) for sorah_num, part in parts]
+    with_diacritics = sum(has_diacritics(prediction) for prediction, _ in raw_texts)
+
+    def normalized_batches() -> Iterator[list[tuple[str, str]]]:
+        for batch in batched(raw_texts, RESCORE_BATCH_SIZE):
+            predictions = normalizer.normalize_batch(prediction for prediction, _ in batch)
+            refs = normalizer.normalize_batch(reference for _, reference in batch)
+            yield list(zip(refs, predictions))
+
+    results: list[WERInfo | Exception] = []
+    normalized: list[tuple[str, str]] = []
+    with ScoringPool(workers, processes=workers > 1) as pool:
+        futures = []
+        for pairs in normalized_batches():
+            normalized.extend(pairs)
+            futures.append(pool.submit(pairs))
+        for future in futures:
+            results.extend(future.result()[0])
+
+    # every sorah of the input is kept, also the ones without parts
+    sorah_entries = {
+        sorah.sorah_num: OutputSorahEntry(sorah_num=sorah.sorah_num, parts=[])
+        for sorah in total_entry.sorahs
+    }
+    sorahs_errors: dict[int, OutputSorahErrorsEntry] = {}
+    for (sorah_num, part), (prediction, reference), (ref_text, pred_text), result in zip(
+        parts, raw_texts, normalized, results
+    ):
+        if isinstance(result, Exception):
+            sorahs_errors.setdefault(
+                sorah_num, OutputSorahErrorsEntry(sorah_num=sorah_num, parts=[])
+            ).parts.append(OutputPartErrorEntry(number=part.number, error_msg=str(result)))
+            continue
+
+        sorah_entries[sorah_num].add_part(
+            OutputPartEntry(
+                number=part.number,
+                pred_text=pred_text,
+                ref_text=ref_text,
+                wer_info=result,
+                bench_data=part.bench_data,
+                raw_pred_text=prediction,
+                raw_ref_text=reference,
+            )
+        )
+
+    rescored = TotalEntry(sorahs=[], model_info=total_entry.model_info)
+    for sorah_entry in sorah_entries.values():
+        rescored.add_sorah(sorah_entry)
+
+    return rescored, list(sorahs_errors.values()), len(parts), with_diacritics
@@ -0,0 +1,94 @@
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import get_context
+from typing import Sequence
+import time
+from jiwer import process_words  # type: ignore
+from .output_types import WERInfo
+
+
+def _wer_info(alignment) -> WERInfo:
+    hits = substitutions = deletions = insertions = 0
+    for chunk in alignment:
+        if chunk.type == "equal":
+            hits += chunk.ref_end_idx - chunk.ref_start_idx
+        elif chunk.type == "substitute":
+            substitutions += chunk.ref_end_idx - chunk.ref_start_idx
+        elif chunk.type == "delete":
+            deletions += chunk.ref_end_idx - chunk.ref_start_idx
+        elif chunk.type == "insert":
+            insertions += chunk.hyp_end_idx - chunk.hyp_start_idx
+
+    reference_words = hits + substitutions + deletions
+    return WERInfo(
+        insertions=insertions,
+        deletions=deletions,
+        hits=hits,
+        substitutions=substitutions,
+        wer=(substitutions + deletions + insertions) / reference_words
+        if reference_words > 0
+        else None,
+    )
+
+
+# (reference, hypothesis) pairs -> WERInfo of each pair, aligned with one
+# process_words call over the whole batch
+def score_pairs(pairs: Sequence[tuple[str, str]]) -> list[WERInfo | Exception]:
+    if len(pairs) == 0:
+        return []
+
+    try:
+        word_output = process_words(
+            reference=[reference for reference, _ in pairs],
+            hypothesis=[hypothesis for _, hypothesis in pairs],
+        )
+        return [_wer_info(alignment) for alignment in word_output.alignments]
+    except Exception as e:
+        if len(pairs) == 1:
+            return [e]
+
+    # e.g. an empty reference, which jiwer rejects for the whole batch
+    results: list[WERInfo | Exception] = []
+    for pair in pairs:
+        results.extend(score_pairs([pair]))
+    return results
+
+
+def _timed_score_pairs(
+    pairs: Sequence[tuple[str, str]],
+) -> tuple[list[WERInfo | Exception], float]:
+    time_start = time.perf_counter()
+    results = score_pairs(pairs)
+    return results, time.perf_counter() - time_start
+
+
+# runs the alignments next to the model instead of after it: threads overlap
+# with inference (torch releases the GIL), processes also score in parallel
+class ScoringPool:
+    def __init__(self, workers: int = 1, processes: bool = False):
+        self._executor: Executor | None = None
+        if workers > 0 and processes:
+            self._executor = ProcessPoolExecutor(
+                max_workers=workers, mp_context=get_context("spawn")
+            )
+        elif workers > 0:
+            self._executor = ThreadPoolExecutor(max_workers=workers)
+
+    def submit(
+        self, pairs: Sequence[tuple[str, str]]
+    ) -> Future[tuple[list[WERInfo | Exception], float]]:
+        if self._executor is not None:
+            return self._executor.submit(_timed_score_pairs, list(pairs))
+
+        future: Future[tuple[list[WERInfo | Exception], float]] = Future()
+        future.set_result(_timed_score_pairs(pairs))
+        return future
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown()
+
+    def __enter__(self) -> "ScoringPool":
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
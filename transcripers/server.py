@@ -0,0 +1,296 @@
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Final, Sequence, Union
+import asyncio
+import json
+import os
+import socket
+import time
+import numpy as np
+from .audio import load_audio_ffmpeg
+from .transcribe import AudioInput, Transcribe, Transcription, as_audio_wave
+from .utils import percentile
+
+
+# the wire format is one JSON header line per message, a transcribe request is
+# followed by `samples` little-endian float32 samples of 16kHz mono audio:
+#   {"op": "transcribe", "samples": N}\n<4N bytes>  -> {"text": ..., "stats": {...}}
+#   {"op": "identity"}\n                            -> the served model identity
+#   {"op": "stats"}\n                               -> ServerStats.report()
+# responses come back in request order, so clients can pipeline requests
+WAVE_DTYPE: Final[np.dtype] = np.dtype("<f4")
+
+LATENCY_WINDOW: Final[int] = 10000
+
+
+def parse_address(address: str) -> tuple[str, Any]:
+    # host:port for tcp, anything else is the path of a unix socket
+    host, _, port = address.rpartition(":")
+    if host != "" and port.isdecimal() and "/" not in address:
+        return "tcp", (host, int(port))
+    return "unix", address
+
+
+class ServerStats:
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.max_queue_depth = 0
+        self.batch_sizes: Counter[int] = Counter()
+        # enqueue -> response time of the most recent requests
+        self.latencies: deque[float] = deque(maxlen=LATENCY_WINDOW)
+        self.inference_s = 0.0
+
+    def report(self, queue_depth: int) -> dict[str, Any]:
+        latencies = sorted(self.latencies)
+        batches = sum(self.batch_sizes.values())
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "queue_depth": queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+            "batches": batches,
+            "mean_batch_size": self.requests / batches if batches > 0 else None,
+            "batch_sizes": {
+                str(size): count for size, count in sorted(self.batch_sizes.items())
+            },
+            "inference_s": self.inference_s,
+            "latency_s": {
+                "p50": percentile(latencies, 50),
+                "p95": percentile(latencies, 95),
+                "p99": percentile(latencies, 99),
+            },
+        }
+
+
+# keeps one model loaded and feeds it micro-batches: the first queued request
+# opens a window of `max_wait_ms`, everything arriving in it (up to
+# `max_batch_size`) is transcribed in the same model call
+class BatchingServer:
+    def __init__(self, model: Transcribe, max_batch_size: int, max_wait_ms: float):
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_wait_s = max_wait_ms / 1000
+        self.stats = ServerStats()
+        # the model is not thread safe, every batch runs on this one thread
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._queue: asyncio.Queue[tuple[np.ndarray, asyncio.Future, float]]
+
+    def _transcribe(self, waves: list[np.ndarray]) -> list[Transcription | Exception]:
+        try:
+            return list(self.model.transcribe_batch(waves))
+        except Exception as e:
+            if len(waves) == 1:
+                return [e]
+
+        results: list[Transcription | Exception] = []
+        for wave in waves:
+            try:
+                results.append(self.model(wave))
+            except Exception as e:
+                results.append(e)
+        return results
+
+    async def _batcher(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait_s
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                try:
+                    if timeout <= 0:
+                        batch.append(self._queue.get_nowait())
+                    else:
+                        batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except (asyncio.QueueEmpty, asyncio.TimeoutError):
+                    break
+
+            self.stats.batch_sizes[len(batch)] += 1
+            time_start = time.perf_counter()
+            results = await loop.run_in_executor(
+                self._executor, self._transcribe, [wave for wave, _, _ in batch]
+            )
+            self.stats.inference_s += time.perf_counter() - time_start
+
+            for (_, future, enqueued), result in zip(batch, results):
+                self.stats.latencies.append(loop.time() - enqueued)
+                if isinstance(result, Exception):
+                    self.stats.errors += 1
+                if not future.cancelled():
+                    future.set_result(result)
+
+    def _response(self, result: Transcription | Exception) -> dict[str, Any]:
+        if isinstance(result, Exception):
+            return {"error": str(result)}
+        return {"text": result.text, "stats": result.stats()}
+
+    async def _write_responses(
+        self, writer: asyncio.StreamWriter, responses: asyncio.Queue
+    ) -> None:
+        while (future := await responses.get()) is not None:
+            result = await future
+            writer.write(json.dumps(result, ensure_ascii=False).encode("utf-8") + b"\n")
+            await writer.drain()
+
+    async def _handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        loop = asyncio.get_running_loop()
+        responses: asyncio.Queue = asyncio.Queue()
+        responder = asyncio.create_task(self._write_responses(writer, responses))
+
+        try:
+            while header_line := await reader.readline():
+                header = json.loads(header_line)
+                future = loop.create_future()
+
+                if header.get("op") == "transcribe":
+                    payload = await reader.readexactly(
+                        header["samples"] * WAVE_DTYPE.itemsize
+                    )
+                    wave = np.frombuffer(payload, dtype=WAVE_DTYPE).astype(np.float32)
+                    transcribed = loop.create_future()
+                    transcribed.add_done_callback(
+                        lambda done, future=future: future.set_result(
+                            self._response(done.result())
+                        )
+                    )
+                    self.stats.requests += 1
+                    await self._queue.put((wave, transcribed, loop.time()))
+                    self.stats.max_queue_depth = max(
+                        self.stats.max_queue_depth, self._queue.qsize()
+                    )
+                elif header.get("op") == "identity":
+                    future.set_result(self.model.identity())
+                elif header.get("op") == "stats":
+                    future.set_result(self.stats.report(self._queue.qsize()))
+                else:
+                    future.set_result({"error": f"unknown op {header.get('op')!r}"})
+
+                await responses.put(future)
+        except (asyncio.IncompleteReadError, ConnectionError, json.JSONDecodeError):
+            pass
+        finally:
+            await responses.put(None)
+            try:
+                await responder
+            except ConnectionError:
+                pass
+            writer.close()
+
+    async def _log_stats(self, interval_s: float) -> None:
+        while True:
+            await asyncio.sleep(interval_s)
+            print(json.dumps(self.stats.report(self._queue.qsize())), flush=True)
+
+    async def serve(self, address: str, stats_interval_s: float = 0) -> None:
+        self._queue = asyncio.Queue()
+        batcher = asyncio.create_task(self._batcher())
+        logger = (
+            asyncio.create_task(self._log_stats(stats_interval_s))
+            if stats_interval_s > 0
+            else None
+        )
+
+        kind, target = parse_address(address)
+        if kind == "tcp":
+            server = await asyncio.start_server(self._handle, *target)
+        else:
+            # a socket left behind by a server that was killed
+            if Path(target).is_socket():
+                os.unlink(target)
+            server = await asyncio.start_unix_server(self._handle, target)
+
+        print(f"Serving {json.dumps(self.model.identity())} on {address}", flush=True)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            batcher.cancel()
+            if logger is not None:
+                logger.cancel()
+            self._executor.shutdown()
+            print(json.dumps(self.stats.report(self._queue.qsize())), flush=True)
+
+
+# Model/Transcribe pair that sends the audio to a `main.py serve` process
+# instead of loading a model, audio is still decoded (and prefetched) locally
+class RemoteModel:
+    def __init__(self, address: str):
+        self.address = address
+        self._socket: socket.socket | None = None
+
+    def _connect(self) -> None:
+        kind, target = parse_address(self.address)
+        if kind == "tcp":
+            self._socket = socket.create_connection(target)
+        else:
+            self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._socket.connect(target)
+        self._reader = self._socket.makefile("rb")
+        self._identity = self._request({"op": "identity"})
+
+    def construct_model(
+        self, path: Union[str, Path], device: str | None = None, **options: Any
+    ) -> Transcribe:
+        # the served model is used, generate rejects the options that would
+        # pick another one. Its identity keys the cache
+        if self._socket is None:
+            self._connect()
+        return self
+
+    def __getstate__(self) -> dict[str, Any]:
+        # --workers processes open their own connection
+        return {"address": self.address, "_socket": None}
+
+    def _send(self, header: dict[str, Any], payload: bytes = b"") -> None:
+        self._socket.sendall(json.dumps(header).encode("utf-8") + b"\n" + payload)  # type: ignore
+
+    def _receive(self) -> dict[str, Any]:
+        line = self._reader.readline()
+        if not line:
+            raise ConnectionError(f"transcription server at {self.address} went away")
+        return json.loads(line)
+
+    def _request(self, header: dict[str, Any]) -> dict[str, Any]:
+        self._send(header)
+        return self._receive()
+
+    def identity(self) -> dict[str, Any]:
+        # also asked before construct_model, for the journal header
+        if self._socket is None:
+            self._connect()
+        return self._identity
+
+    def stats(self) -> dict[str, Any]:
+        return self._request({"op": "stats"})
+
+    def load_audio_wave(self, audio_file_path: Union[str, Path]) -> np.ndarray:
+        return load_audio_ffmpeg(str(audio_file_path))
+
+    def __call__(self, audio: AudioInput) -> Transcription:
+        return self.transcribe_batch([audio])[0]
+
+    def transcribe_batch(self, audios: Sequence[AudioInput]) -> list[Transcription]:
+        # every request is sent before reading the first response, so the
+        # server can put the whole batch into one micro-batch
+        for audio in audios:
+            wave = np.ascontiguousarray(as_audio_wave(self, audio), dtype=WAVE_DTYPE)
+            self._send({"op": "transcribe", "samples": len(wave)}, wave.tobytes())
+
+        responses = [self._receive() for _ in audios]
+        for response in responses:
+            if "error" in response:
+                raise RuntimeError(response["error"])
+        return [
+            Transcription(text=response["text"], **response["stats"])
+            for response in responses
+        ]
+
+    def close(self) -> None:
+        if self._socket is not None:
+            self._reader.close()
+            self._socket.close()
+            self._socket = None
@@ -1,34 +1,297 @@
-from typing import Protocol, Union, Callable, Any, Optional
+from typing import Protocol, Union, Any, Final, Sequence, TYPE_CHECKING
+from contextlib import nullcontext
+from dataclasses import dataclass, asdict, fields, replace
 from pathlib import Path
-from .utils import DEVICE, remove_diacritics  # type: ignore
-from whisper import load_model, load_audio  # type: ignore
+from sys import stderr
+from .utils import default_device  # type: ignore
 import time
-from transformers import pipeline  # type: ignore
-import torch
-import torchaudio  # type: ignore
-import torchaudio.transforms as at  # type: ignore
-import re
+import zlib
+import numpy as np
 
+# the backends (whisper, transformers, torch, torchaudio) take seconds to
+# import, they are only imported once the chosen constructor needs them
+if TYPE_CHECKING:
+    import torch
+
+
+def load_wave(wave_path, sample_rate: int = 16000) -> "torch.Tensor":
+    import torchaudio  # type: ignore
+    import torchaudio.transforms as at  # type: ignore
 
-def load_wave(wave_path, sample_rate: int = 16000) -> torch.Tensor:
     waveform, sr = torchaudio.load(wave_path, normalize=True, backend="ffmpeg")
     if sample_rate != sr:
         waveform = at.Resample(sr, sample_rate)(waveform)
     return waveform
 
 
+# either a path to an audio file or an already decoded 16kHz mono wave
+AudioInput = Union[str, Path, np.ndarray]
+
+PRECISIONS: Final[list[str]] = ["fp32", "bf16", "int8"]
+
+# whisper's encoder always sees 30s windows, both backends pad shorter audio
+# (and the last window of longer audio) with silence up to that length, whatever
+# else is in the batch
+WINDOW_SAMPLES: Final[int] = 30 * 16000
+
+
+def window_padding_s(audio_wave: np.ndarray, sample_rate: int = 16000) -> float:
+    return -len(audio_wave) % WINDOW_SAMPLES / sample_rate
+
+
+def idle_decoder_steps(token_counts: Sequence[int], batch_size: int) -> list[int]:
+    # a batched decoder runs until the longest output of the batch is done, the
+    # finished sequences of the batch wait for it
+    idle: list[int] = []
+    for start in range(0, len(token_counts), batch_size):
+        batch = token_counts[start : start + batch_size]
+        idle.extend(max(batch) - count for count in batch)
+    return idle
+
+
+def resolve_precision(precision: str, device: str) -> str:
+    import torch
+
+    if precision not in PRECISIONS:
+        raise ValueError(
+            f"unknown precision {precision!r} (expected one of {', '.join(PRECISIONS)})"
+        )
+    if precision == "int8" and not device.startswith("cpu"):
+        raise ValueError("int8 dynamic quantization only runs on cpu")
+    if precision == "bf16":
+        if device.startswith("cuda"):
+            supported = torch.cuda.is_bf16_supported()
+        else:
+            try:
+                supported = torch.ops.mkldnn._is_mkldnn_bf16_supported()
+            except (AttributeError, RuntimeError):
+                supported = False
+        if not supported:
+            print(f"bf16 is not supported on {device}, falling back to fp32", file=stderr)
+            return "fp32"
+    return precision
+
+
+def quantize_int8(module: "torch.nn.Module") -> "torch.nn.Module":
+    import torch
+
+    # openai-whisper subclasses nn.Linear only to cast the weights to the input
+    # dtype, quantize_dynamic only converts exact nn.Linear modules
+    for submodule in module.modules():
+        if isinstance(submodule, torch.nn.Linear):
+            submodule.__class__ = torch.nn.Linear
+
+    return torch.ao.quantization.quantize_dynamic(
+        module, {torch.nn.Linear}, dtype=torch.qint8
+    )
+
+
+def precision_context(precision: str, device: str):
+    # int8 weights are already converted, only bf16 needs autocast around the call
+    if precision != "bf16":
+        return nullcontext()
+
+    import torch
+
+    return torch.autocast(
+        device_type="cuda" if device.startswith("cuda") else "cpu",
+        dtype=torch.bfloat16,
+    )
+
+
+DECODE_POLICIES: Final[list[str]] = ["fallback", "greedy-first"]
+
+
+# None leaves an option to the backend (openai-whisper: greedy, temperatures
+# 0.0..1.0 by 0.2 and the thresholds below, transformers: one greedy pass)
+@dataclass(frozen=True)
+class DecodeOptions:
+    beam_size: int | None = None
+    # tried in order while an output fails the thresholds
+    temperatures: tuple[float, ...] | None = None
+    compression_ratio_threshold: float | None = None
+    logprob_threshold: float | None = None
+    no_speech_threshold: float | None = None
+    # fallback: the temperature schedule, with beam search from the first attempt
+    # greedy-first: a greedy attempt first, beam search and the schedule only
+    # when it fails the thresholds
+    policy: str = "fallback"
+
+    def __post_init__(self):
+        if self.policy not in DECODE_POLICIES:
+            raise ValueError(
+                f"unknown decode policy {self.policy!r} (expected one of {', '.join(DECODE_POLICIES)})"
+            )
+
+    def with_defaults(self, defaults: "DecodeOptions") -> "DecodeOptions":
+        return replace(
+            self,
+            **{
+                field.name: getattr(defaults, field.name)
+                for field in fields(self)
+                if getattr(self, field.name) is None
+            },
+        )
+
+    def generation_options(self) -> dict[str, Any]:
+        # only what was set, so the backend defaults stay in charge of the rest
+        return {
+            field.name: getattr(self, field.name)
+            for field in fields(self)
+            if field.name != "policy" and getattr(self, field.name) is not None
+        }
+
+
+WHISPER_DECODE_DEFAULTS: Final[DecodeOptions] = DecodeOptions(
+    temperatures=(0.0, 0.2, 0.4, 0.6, 0.8, 1.0),
+    compression_ratio_threshold=2.4,
+    logprob_threshold=-1.0,
+    no_speech_threshold=0.6,
+)
+
+
+def compression_ratio(text: str) -> float:
+    # how whisper spots repetition loops
+    text_bytes = text.encode("utf-8")
+    if len(text_bytes) == 0:
+        return 0.0
+    return len(text_bytes) / len(zlib.compress(text_bytes))
+
+
+def needs_fallback(
+    options: DecodeOptions,
+    compression_ratio: float,
+    avg_logprob: float | None = None,
+    no_speech_prob: float | None = None,
+) -> bool:
+    # the checks of whisper.transcribe's decode_with_fallback
+    needs = False
+    if (
+        options.compression_ratio_threshold is not None
+        and compression_ratio > options.compression_ratio_threshold
+    ):
+        needs = True
+    if (
+        options.logprob_threshold is not None
+        and avg_logprob is not None
+        and avg_logprob < options.logprob_threshold
+    ):
+        needs = True
+    if (
+        options.no_speech_threshold is not None
+        and no_speech_prob is not None
+        and no_speech_prob > options.no_speech_threshold
+    ):
+        # silence, retrying would not produce anything better
+        needs = False
+    return needs
+
+
+@dataclass
+class Transcription:
+    # raw (un-normalized) model output
+    text: str
+    processing_time: float
+    # parts of processing_time, when the backend can tell them apart
+    feature_extraction_time: float | None = None
+    inference_time: float | None = None
+    generated_tokens: int | None = None
+    # (start_s, end_s, word) of every predicted word, when the model was
+    # constructed with word_timestamps
+    words: list[tuple[float, float, str]] | None = None
+    # decoding passes the part needed, more than 1 means it fell back
+    decode_attempts: int | None = None
+    # forward passes of the draft model of speculative decoding, and how many
+    # of the drafted tokens the main model kept, estimated from the pass counts
+    draft_tokens: int | None = None
+    estimated_accepted_draft_tokens: int | None = None
+    # silence the model input was padded with to fill its 30s windows, and the
+    # decoder steps this output spent finished while the rest of its batch was
+    # still decoding
+    padding_s: float | None = None
+    idle_decoder_steps: int | None = None
+
+    def stats(self) -> dict[str, Any]:
+        stats = asdict(self)
+        del stats["text"]
+        return stats
+
+
 class Transcribe(Protocol):
-    def __call__(
-        self, audio_file_path: Union[str, Path], normalize_text: bool = True
-    ) -> tuple[str, float]: ...
+    def __call__(self, audio: AudioInput) -> Transcription: ...
+
+    def transcribe_batch(self, audios: Sequence[AudioInput]) -> list[Transcription]: ...
+
+    def load_audio_wave(self, audio_file_path: Union[str, Path]) -> np.ndarray: ...
+
+    # everything that changes the output for the same audio (used as cache key)
+    def identity(self) -> dict[str, Any]: ...
+
+
+def as_audio_wave(model: Transcribe, audio: AudioInput) -> np.ndarray:
+    if isinstance(audio, np.ndarray):
+        return audio
+    return model.load_audio_wave(audio)
+
+
+def _decode_identity(decode_options: DecodeOptions) -> dict[str, Any]:
+    # left out when nothing was changed, so existing cache entries stay valid
+    if decode_options == DecodeOptions():
+        return {}
+    return {"decode": asdict(decode_options)}
+
+
+OPENAI_MODEL_NAMES: Final[set[str]] = {
+    "tiny",
+    "base",
+    "small",
+    "medium",
+    "large",
+    "large-v1",
+    "large-v2",
+    "large-v3",
+}
+
+
+def hf_model_id(path: Union[str, Path]) -> str:
+    # the openai-whisper names stand for the same checkpoints on the hub
+    path = str(path)
+    if path in OPENAI_MODEL_NAMES:
+        return f"openai/whisper-{path}"
+    return path
+
+
+def check_draft_compatibility(path: Union[str, Path], draft_path: Union[str, Path]) -> None:
+    # assisted generation checks the draft tokens against the main model token
+    # by token, both need the same vocabulary and the same input features
+    from transformers import AutoConfig, AutoTokenizer  # type: ignore
+
+    path, draft_path = hf_model_id(path), hf_model_id(draft_path)
+    if AutoTokenizer.from_pretrained(path).get_vocab() != AutoTokenizer.from_pretrained(
+        draft_path
+    ).get_vocab():
+        raise ValueError(f"draft model {draft_path} does not share the tokenizer of {path}")
+
+    num_mel_bins = AutoConfig.from_pretrained(path).num_mel_bins
+    draft_num_mel_bins = AutoConfig.from_pretrained(draft_path).num_mel_bins
+    if num_mel_bins != draft_num_mel_bins:
+        raise ValueError(
+            f"draft model {draft_path} takes {draft_num_mel_bins} mel bins, {path} takes {num_mel_bins}"
+        )
 
 
 class Model(Protocol):
     def construct_model(
         self,
         path: Union[str, Path],
-        device: str = DEVICE,
-        fn: Optional[Callable[[str], Any]] = None,
+        device: str | None = None,
+        batch_size: int = 1,
+        short_form: bool = False,
+        precision: str = "fp32",
+        weights_cache: str | None = None,
+        word_timestamps: bool = False,
+        decode_options: DecodeOptions | None = None,
+        draft_model: str | None = None,
     ) -> Transcribe: ...
 
 
@@ -36,56 +299,470 @@ class OpenAIWhisperModel:
     def construct_model(
         self,
         path: Union[str, Path],
-        device: str = DEVICE,
-        fn: Optional[Callable[[str], Any]] = None,
+        device: str | None = None,
+        batch_size: int = 1,
+        short_form: bool = False,
+        precision: str = "fp32",
+        weights_cache: str | None = None,
+        word_timestamps: bool = False,
+        decode_options: DecodeOptions | None = None,
+        draft_model: str | None = None,
     ) -> Transcribe:
+        from .weights import load_whisper_checkpoint
+
+        if draft_model is not None:
+            raise ValueError("a draft model is only supported by TransformersWhisperModel")
+
         path = str(path)
-        self.model = load_model(path, device=device)
-        self.fn = fn
+        device = device or default_device()
+        self.path = path
+        self.precision = resolve_precision(precision, device)
+
+        # checkpoint files are converted once into weights_cache and memory
+        # mapped from there on the next runs
+        time_start = time.perf_counter()
+        self.model, load_source = load_whisper_checkpoint(path, device, weights_cache)
+        self.load_time = time.perf_counter() - time_start
+        print(
+            f"Loaded {path} from {load_source} in {self.load_time:.2f}s", file=stderr
+        )
+
+        if self.precision == "int8":
+            self.model = quantize_int8(self.model)
+        self.device = device
+        self.batch_size = batch_size
+        self.short_form = short_form
+        self.word_timestamps = word_timestamps
+        self.decode_options = decode_options or DecodeOptions()
         return self
 
-    def __call__(
-        self, audio_file_path: Union[str, Path], normalize_text: bool = True
-    ) -> tuple[str, float]:
-        audio_file_path = str(audio_file_path)
-        audio_wave = load_audio(audio_file_path)
+    def identity(self) -> dict[str, Any]:
+        return {
+            "backend": type(self).__name__,
+            "model": self.path,
+            "options": {
+                "language": "ar",
+                "short_form": self.short_form,
+                "fp16": self._fp16(),
+                "precision": self.precision,
+                "word_timestamps": self.word_timestamps,
+                **_decode_identity(self.decode_options),
+            },
+        }
+
+    def _fp16(self) -> bool:
+        # whisper's own half precision on cuda, unless bf16 was asked for
+        return self.precision == "fp32" and self.model.device.type != "cpu"
+
+    def load_audio_wave(self, audio_file_path: Union[str, Path]) -> np.ndarray:
+        from whisper import load_audio  # type: ignore
+
+        return load_audio(str(audio_file_path))
+
+    def _transcribe_long_form(self, audio_wave: np.ndarray) -> Transcription:
+        from whisper.decoding import decode  # type: ignore
+
+        options = self.decode_options.with_defaults(WHISPER_DECODE_DEFAULTS)
+        attempts = 0
+
+        # transcribe() calls model.decode once per attempt of every window,
+        # counting them here is the only way to see its fallbacks
+        def decode_attempt(mel, decoding_options):
+            nonlocal attempts
+            if (
+                options.policy == "greedy-first"
+                and decoding_options.temperature == 0
+                and decoding_options.beam_size is not None
+            ):
+                attempts += 1
+                result = decode(self.model, mel, replace(decoding_options, beam_size=None))
+                if not needs_fallback(
+                    options, result.compression_ratio, result.avg_logprob, result.no_speech_prob
+                ):
+                    return result
+            attempts += 1
+            return decode(self.model, mel, decoding_options)
+
         time_start = time.perf_counter()
-        result = self.model.transcribe(audio_wave, language="ar")
+        self.model.decode = decode_attempt
+        try:
+            with precision_context(self.precision, self.device):
+                result = self.model.transcribe(
+                    audio_wave,
+                    language="ar",
+                    fp16=self._fp16(),
+                    word_timestamps=self.word_timestamps,
+                    beam_size=options.beam_size,
+                    temperature=options.temperatures,
+                    compression_ratio_threshold=options.compression_ratio_threshold,
+                    logprob_threshold=options.logprob_threshold,
+                    no_speech_threshold=options.no_speech_threshold,
+                )
+        finally:
+            del self.model.decode
         time_end = time.perf_counter()
         processing_time = time_end - time_start
 
-        if self.fn:
-            self.fn(result["text"])
+        return Transcription(
+            text=result["text"],  # type: ignore
+            processing_time=processing_time,
+            inference_time=processing_time,
+            generated_tokens=sum(
+                len(segment["tokens"]) for segment in result["segments"]  # type: ignore
+            ),
+            words=[
+                (word["start"], word["end"], word["word"])
+                for segment in result["segments"]  # type: ignore
+                for word in segment["words"]  # type: ignore
+            ]
+            if self.word_timestamps
+            else None,
+            decode_attempts=attempts,
+            # one clip at a time, only its windows are padded
+            padding_s=window_padding_s(audio_wave),
+            idle_decoder_steps=0,
+        )
+
+    def _decode_with_fallback(self, mels: "torch.Tensor") -> list[tuple[Any, int, int]]:
+        # whisper.decode has no fallback of its own, the clips that fail the
+        # thresholds are decoded again together at the next temperature
+        from whisper import decode, DecodingOptions  # type: ignore
+
+        options = self.decode_options.with_defaults(WHISPER_DECODE_DEFAULTS)
+        schedule = [
+            (temperature, options.beam_size if temperature == 0 else None)
+            for temperature in options.temperatures  # type: ignore
+        ]
+        if options.policy == "greedy-first" and options.beam_size is not None:
+            schedule.insert(0, (0.0, None))
+
+        results: list[Any] = [None] * len(mels)
+        attempts = [0] * len(mels)
+        idle = [0] * len(mels)
+        pending = list(range(len(mels)))
+        for step, (temperature, beam_size) in enumerate(schedule):
+            decoding_results = decode(
+                self.model,
+                mels[pending],
+                DecodingOptions(
+                    language="ar",
+                    without_timestamps=True,
+                    fp16=self._fp16(),
+                    temperature=temperature,
+                    beam_size=beam_size,
+                ),
+            )
+            failed = []
+            steps = idle_decoder_steps(
+                [len(decoding_result.tokens) for decoding_result in decoding_results],
+                len(pending),
+            )
+            for index, decoding_result, idle_steps in zip(pending, decoding_results, steps):
+                results[index] = decoding_result
+                attempts[index] += 1
+                idle[index] += idle_steps
+                if step < len(schedule) - 1 and needs_fallback(
+                    options,
+                    decoding_result.compression_ratio,
+                    decoding_result.avg_logprob,
+                    decoding_result.no_speech_prob,
+                ):
+                    failed.append(index)
+            pending = failed
+            if len(pending) == 0:
+                break
+
+        return list(zip(results, attempts, idle))
+
+    def __call__(self, audio: AudioInput) -> Transcription:
+        if self.short_form and not self.word_timestamps:
+            return self.transcribe_batch([audio])[0]
+
+        return self._transcribe_long_form(as_audio_wave(self, audio))
+
+    def transcribe_batch(self, audios: Sequence[AudioInput]) -> list[Transcription]:
+        # decode() has no word timestamps, they need the transcribe() loop
+        if not self.short_form or self.word_timestamps:
+            return [self._transcribe_long_form(as_audio_wave(self, audio)) for audio in audios]
+
+        import torch
+        from whisper import pad_or_trim, log_mel_spectrogram  # type: ignore
+        from whisper.audio import N_SAMPLES  # type: ignore
+
+        audio_waves = [as_audio_wave(self, audio) for audio in audios]
+        results: list[Transcription | None] = [None] * len(audio_waves)
+
+        # clips that fit in one 30s window skip the sliding-window loop and are
+        # decoded together, longer ones still need transcribe()
+        short_indices = []
+        for index, audio_wave in enumerate(audio_waves):
+            if len(audio_wave) <= N_SAMPLES:
+                short_indices.append(index)
+            else:
+                results[index] = self._transcribe_long_form(audio_wave)
+
+        if len(short_indices) > 0:
+            time_start = time.perf_counter()
+            mels = torch.stack(
+                [
+                    log_mel_spectrogram(
+                        pad_or_trim(audio_waves[index]), n_mels=self.model.dims.n_mels
+                    )
+                    for index in short_indices
+                ]
+            ).to(self.model.device)
+            time_features = time.perf_counter()
+            with precision_context(self.precision, self.device):
+                decoding_results = self._decode_with_fallback(mels)
+            time_end = time.perf_counter()
+            # the whole batch shares one forward pass, so the time is split evenly
+            processing_time = (time_end - time_start) / len(short_indices)
+            feature_extraction_time = (time_features - time_start) / len(short_indices)
+            inference_time = (time_end - time_features) / len(short_indices)
+
+            for index, (decoding_result, attempts, idle_steps) in zip(
+                short_indices, decoding_results
+            ):
+                results[index] = Transcription(
+                    text=decoding_result.text,
+                    processing_time=processing_time,
+                    feature_extraction_time=feature_extraction_time,
+                    inference_time=inference_time,
+                    generated_tokens=len(decoding_result.tokens),
+                    decode_attempts=attempts,
+                    padding_s=window_padding_s(audio_waves[index]),
+                    idle_decoder_steps=idle_steps,
+                )
 
-        return remove_diacritics(result["text"]) if normalize_text else result["text"], processing_time  # type: ignore
+        return results  # type: ignore
 
 
 class TransformersWhisperModel:
     def construct_model(
         self,
         path: Union[str, Path],
-        device: str = DEVICE,
-        fn: Optional[Callable[[str], Any]] = None,
+        device: str | None = None,
+        batch_size: int = 1,
+        short_form: bool = False,
+        precision: str = "fp32",
+        weights_cache: str | None = None,
+        word_timestamps: bool = False,
+        decode_options: DecodeOptions | None = None,
+        draft_model: str | None = None,
     ) -> Transcribe:
+        # the pipeline already batches single-window clips natively, so
+        # short_form has nothing to switch here, and transformers checkpoints
+        # are safetensors already, so there is nothing for weights_cache to convert
+        from transformers import pipeline  # type: ignore
+
         path = str(path)
+        device = device or default_device()
+        self.path = path
+        self.precision = resolve_precision(precision, device)
+        time_start = time.perf_counter()
         self.model = pipeline(
-            "automatic-speech-recognition", model=path, chunk_length_s=30, device=device
+            "automatic-speech-recognition",
+            model=path,
+            chunk_length_s=30,
+            device=device,
         )
+        self.load_time = time.perf_counter() - time_start
+        print(f"Loaded {path} in {self.load_time:.2f}s", file=stderr)
+        if self.precision == "int8":
+            self.model.model = quantize_int8(self.model.model)
 
-        self.fn = fn
+        self.device = device
+        self.batch_size = batch_size
+        self.word_timestamps = word_timestamps
+        self.decode_options = decode_options or DecodeOptions()
+
+        self.draft_model = draft_model
+        self.draft = None
+        if draft_model is not None:
+            self._load_draft(draft_model)
 
         return self
 
-    def __call__(
-        self, audio_file_path: Union[str, Path], normalize_text: bool = True
-    ) -> tuple[str, float]:
-        audio_wave = load_wave(audio_file_path)[0]
+    def _load_draft(self, draft_model: str) -> None:
+        from transformers import AutoModelForSpeechSeq2Seq  # type: ignore
+
+        # sampling and beam search would make the output depend on the draft
+        if self.decode_options.beam_size is not None or (
+            self.decode_options.temperatures is not None
+            and any(temperature > 0 for temperature in self.decode_options.temperatures)
+        ):
+            raise ValueError(
+                "speculative decoding keeps the output identical only for greedy decoding, "
+                "it can not be combined with a beam size or temperatures above 0"
+            )
+        check_draft_compatibility(self.path, draft_model)
+
         time_start = time.perf_counter()
-        result = self.model(audio_wave.numpy())
-        time_end = time.perf_counter()
-        processing_time = time_end - time_start
+        self.draft = AutoModelForSpeechSeq2Seq.from_pretrained(
+            hf_model_id(draft_model)
+        ).to(self.device)
+        if self.precision == "int8":
+            self.draft = quantize_int8(self.draft)
+        print(
+            f"Loaded draft model {draft_model} in {time.perf_counter() - time_start:.2f}s",
+            file=stderr,
+        )
+
+        # every verification step is one forward pass of the main decoder and
+        # every drafted token one of the draft decoder
+        self._decoder_passes = {"main": 0, "draft": 0}
+
+        def count(name: str):
+            def hook(*_):
+                self._decoder_passes[name] += 1
+
+            return hook
+
+        self.model.model.get_decoder().register_forward_hook(count("main"))
+        self.draft.get_decoder().register_forward_hook(count("draft"))
+
+    def identity(self) -> dict[str, Any]:
+        return {
+            "backend": type(self).__name__,
+            "model": self.path,
+            "options": {
+                "chunk_length_s": 30,
+                "precision": self.precision,
+                "word_timestamps": self.word_timestamps,
+                **_decode_identity(self.decode_options),
+                # recorded with the results, the timings and draft stats depend on it
+                **({"draft_model": self.draft_model} if self.draft is not None else {}),
+            },
+        }
+
+    def _generate_kwargs(self, greedy: bool = False) -> dict[str, Any]:
+        options = self.decode_options.generation_options()
+        generate_kwargs = {
+            {"beam_size": "num_beams", "temperatures": "temperature"}.get(name, name): value
+            for name, value in options.items()
+        }
+        if greedy:
+            generate_kwargs["num_beams"] = 1
+        if self.draft is not None:
+            generate_kwargs["assistant_model"] = self.draft
+        return generate_kwargs
 
-        if self.fn:
-            self.fn(result["text"])
+    def _run_pipeline(self, audio_waves: list[np.ndarray], greedy: bool = False) -> list[Any]:
+        with precision_context(self.precision, self.device):
+            return self.model(
+                audio_waves,
+                # assisted generation only runs one sequence at a time
+                batch_size=1 if self.draft is not None else self.batch_size,
+                generate_kwargs=self._generate_kwargs(greedy),
+                **({"return_timestamps": "word"} if self.word_timestamps else {}),
+            )
+
+    def load_audio_wave(self, audio_file_path: Union[str, Path]) -> np.ndarray:
+        return load_wave(audio_file_path)[0].numpy()
+
+    def __call__(self, audio: AudioInput) -> Transcription:
+        return self.transcribe_batch([audio])[0]
+
+    def _transcription(
+        self, result: dict[str, Any], processing_time: float, **stats: Any
+    ) -> Transcription:
+        # the pipeline does not hand out the generated ids, re-tokenizing the
+        # text gives the same count without the special tokens
+        return Transcription(
+            text=result["text"],
+            processing_time=processing_time,
+            inference_time=processing_time,
+            generated_tokens=len(
+                self.model.tokenizer(result["text"], add_special_tokens=False).input_ids
+            ),
+            words=[
+                (chunk["timestamp"][0], chunk["timestamp"][1], chunk["text"])
+                for chunk in result["chunks"]
+            ]
+            if self.word_timestamps
+            else None,
+            **stats,
+        )
+
+    def _transcribe_assisted(self, audio_wave: np.ndarray) -> Transcription:
+        self._decoder_passes.update(main=0, draft=0)
+        time_start = time.perf_counter()
+        result = self._run_pipeline([audio_wave])[0]
+        transcription = self._transcription(
+            result,
+            time.perf_counter() - time_start,
+            decode_attempts=1,
+            padding_s=window_padding_s(audio_wave),
+            idle_decoder_steps=0,
+        )
+
+        # every verification step keeps the accepted draft tokens plus one token
+        # of the main model, so the accepted ones are what the steps did not
+        # produce. Only an estimate: generated_tokens leaves out the special and
+        # end of text tokens the passes did produce, and every 30s chunk of a
+        # long part starts with passes over its prompt
+        transcription.draft_tokens = self._decoder_passes["draft"]
+        transcription.estimated_accepted_draft_tokens = min(
+            self._decoder_passes["draft"],
+            max(0, transcription.generated_tokens - self._decoder_passes["main"]),  # type: ignore
+        )
+        return transcription
+
+    def transcribe_batch(self, audios: Sequence[AudioInput]) -> list[Transcription]:
+        audio_waves = [as_audio_wave(self, audio) for audio in audios]
+        if self.draft is not None:
+            return [self._transcribe_assisted(audio_wave) for audio_wave in audio_waves]
+
+        time_start = time.perf_counter()
+        # temperature fallbacks inside generate() are not reported
+        temperatures = self.decode_options.temperatures
+        attempts: list[int | None] = [
+            1 if temperatures is None or len(temperatures) <= 1 else None
+        ] * len(audio_waves)
+        if (
+            self.decode_options.policy == "greedy-first"
+            and self.decode_options.beam_size is not None
+        ):
+            # the pipeline hands out no log probabilities, the repetition check
+            # on the text decides which clips get the beam search pass
+            results = list(self._run_pipeline(audio_waves, greedy=True))
+            options = self.decode_options.with_defaults(WHISPER_DECODE_DEFAULTS)
+            failed = [
+                index
+                for index, result in enumerate(results)
+                if needs_fallback(options, compression_ratio(result["text"]))
+            ]
+            if len(failed) > 0:
+                for index, result in zip(
+                    failed, self._run_pipeline([audio_waves[index] for index in failed])
+                ):
+                    results[index] = result
+                    attempts[index] = (
+                        None if attempts[index] is None else attempts[index] + 1  # type: ignore
+                    )
+        else:
+            results = self._run_pipeline(audio_waves)
+        time_end = time.perf_counter()
+        # the whole batch shares one forward pass, so the time is split evenly
+        processing_time = (time_end - time_start) / len(audio_waves)
 
-        return remove_diacritics(result["text"]) if normalize_text else result["text"], processing_time  # type: ignore
+        transcriptions = [
+            self._transcription(
+                result,
+                processing_time,
+                decode_attempts=attempt,
+                padding_s=window_padding_s(audio_wave),
+            )
+            for result, attempt, audio_wave in zip(results, attempts, audio_waves)
+        ]
+        # the pipeline cuts the clips into batches of batch_size in order (the
+        # outputs of the beam search pass of greedy-first stand in for both)
+        for transcription, idle_steps in zip(
+            transcriptions,
+            idle_decoder_steps(
+                [transcription.generated_tokens for transcription in transcriptions],  # type: ignore
+                self.batch_size,
+            ),
+        ):
+            transcription.idle_decoder_steps = idle_steps
+        return transcriptions
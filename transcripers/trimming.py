@@ -0,0 +1,77 @@
+from typing import Final
+import numpy as np
+from .audio import SAMPLE_RATE
+
+
+# energy: frames quieter than `threshold_db` below the loudest frame of the part
+# timings: the first/last word boundaries of the metadata, energy when a part
+# has none (e.g. AyatTranscriper)
+TRIM_MODES: Final[list[str]] = ["none", "energy", "timings"]
+
+
+# cuts the leading and trailing silence (and breaths) of a part before it
+# reaches the model, the padding keeps the onset/decay of the first/last word
+class SilenceTrimmer:
+    def __init__(
+        self,
+        mode: str = "energy",
+        threshold_db: float = -40.0,
+        padding_ms: float = 200.0,
+        frame_ms: float = 20.0,
+        sample_rate: int = SAMPLE_RATE,
+    ):
+        if mode not in TRIM_MODES[1:]:
+            raise ValueError(
+                f"unknown trimming mode {mode!r} (expected one of {', '.join(TRIM_MODES[1:])})"
+            )
+        self.mode = mode
+        self.threshold_db = threshold_db
+        self.padding = round(padding_ms * sample_rate / 1000)
+        self.frame_length = max(1, round(frame_ms * sample_rate / 1000))
+        self.sample_rate = sample_rate
+
+    def key(self, speech_ms: tuple[float, float] | None = None) -> str:
+        # part of the cache key, the same audio trimmed differently is another input
+        if self.mode == "timings" and speech_ms is not None:
+            return f"trim:timings:{speech_ms[0]}-{speech_ms[1]}:{self.padding}"
+        return f"trim:energy:{self.threshold_db}:{self.frame_length}:{self.padding}"
+
+    def speech_range(self, wave: np.ndarray) -> tuple[int, int]:
+        frames_count = len(wave) // self.frame_length
+        if frames_count == 0:
+            return 0, len(wave)
+
+        frames = wave[: frames_count * self.frame_length].reshape(
+            frames_count, self.frame_length
+        )
+        # mean power of every frame in one pass, without squaring into a copy
+        power = np.einsum("ij,ij->i", frames, frames) / self.frame_length
+        power_db = 10 * np.log10(power + 1e-10)
+        voiced = np.flatnonzero(power_db > power_db.max() + self.threshold_db)
+        if len(voiced) == 0:
+            return 0, len(wave)
+
+        start = voiced[0] * self.frame_length
+        # the partial frame at the end is never dropped after a voiced last frame
+        end = (
+            len(wave)
+            if voiced[-1] == frames_count - 1
+            else (voiced[-1] + 1) * self.frame_length
+        )
+        return int(start), int(end)
+
+    def __call__(
+        self, wave: np.ndarray, speech_ms: tuple[float, float] | None = None
+    ) -> tuple[np.ndarray, float]:
+        # (trimmed view of the wave, trimmed seconds)
+        if self.mode == "timings" and speech_ms is not None:
+            start = round(speech_ms[0] * self.sample_rate / 1000)
+            end = round(speech_ms[1] * self.sample_rate / 1000)
+        else:
+            start, end = self.speech_range(wave)
+
+        start = max(0, start - self.padding)
+        end = min(len(wave), end + self.padding)
+        if end <= start:
+            return wave, 0.0
+        return wave[start:end], (len(wave) - (end - start)) / self.sample_rate
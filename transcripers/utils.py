@@ -1,19 +1,90 @@
 from pathlib import Path
-from typing import Final, Callable, Any
-import torch
-import re
+from contextlib import contextmanager
+from functools import lru_cache
+from threading import Lock
+from typing import Callable, Any, Iterable, Iterator, TypeVar
+import heapq
+import math
+import sys
+import time
+from .normalization import has_diacritics
 
 
-DEVICE: Final[str] = "cuda" if torch.cuda.is_available() else "cpu"
+# resolved on first use, importing torch just for the default would make every
+# CLI invocation (even --help) pay for it
+@lru_cache(maxsize=None)
+def default_device() -> str:
+    import torch
+
+    return "cuda" if torch.cuda.is_available() else "cpu"
+
+T = TypeVar("T")
+
+
+def peak_memory_mb() -> tuple[float | None, float | None]:
+    # (peak resident set size, peak torch CUDA allocation) of this process
+    try:
+        import resource
+
+        # kilobytes on linux
+        peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    except ImportError:
+        peak_rss_mb = None
+
+    peak_allocated_mb = None
+    # never the reason torch gets imported
+    torch = sys.modules.get("torch")
+    if torch is not None and torch.cuda.is_available() and torch.cuda.is_initialized():
+        peak_allocated_mb = torch.cuda.max_memory_allocated() / (1024 * 1024)
+
+    return peak_rss_mb, peak_allocated_mb
 
 
 def path_join(dir: Path, rest: str) -> str:
     return str(dir.joinpath(Path(rest)).absolute())
 
 
-def remove_diacritics(text: str) -> str:
-    text = re.sub(r"[ًٌٍَُِّْ]", "", text)
-    return text
+def batched(iterable: Iterable[T], size: int) -> Iterator[list[T]]:
+    if size < 1:
+        raise ValueError(f"batch size must be >= 1 (got {size})")
+
+    batch: list[T] = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+
+    if len(batch) > 0:
+        yield batch
+
+
+def partition_by_weight(
+    items: list[T], n: int, weight: Callable[[T], float]
+) -> list[list[T]]:
+    # longest-processing-time-first greedy: the heaviest remaining item goes to
+    # the lightest bin, each bin keeps the original order of its items
+    bins: list[list[tuple[int, T]]] = [[] for _ in range(min(n, len(items)))]
+    if len(bins) == 0:
+        return []
+
+    heap = [(0.0, index) for index in range(len(bins))]
+    for index, item in sorted(
+        enumerate(items), key=lambda indexed: weight(indexed[1]), reverse=True
+    ):
+        load, bin_index = heapq.heappop(heap)
+        bins[bin_index].append((index, item))
+        heapq.heappush(heap, (load + weight(item), bin_index))
+
+    return [[item for _, item in sorted(bin_items, key=lambda x: x[0])] for bin_items in bins]
+
+
+def percentile(sorted_values: list[float], percent: float) -> float | None:
+    if len(sorted_values) == 0:
+        return None
+    # nearest-rank, always one of the observed values
+    rank = max(1, math.ceil(percent / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
 
 
 class Counter:
@@ -27,12 +98,55 @@ class Counter:
         return self.value
 
 
+# wall time spent per pipeline stage, shared by the prefetch threads
+class StageTimer:
+    def __init__(self):
+        self.stages: dict[str, list[float]] = {}
+        self._lock = Lock()
+
+    # a worker process gets an empty timer, the parent merges back only the
+    # stages the worker timed itself
+    def __getstate__(self) -> dict[str, Any]:
+        return {}
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__init__()
+
+    @contextmanager
+    def __call__(self, stage: str, count: int = 1) -> Iterator[None]:
+        time_start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, time.perf_counter() - time_start, count)
+
+    def add(self, stage: str, seconds: float, count: int = 1) -> None:
+        with self._lock:
+            totals = self.stages.setdefault(stage, [0.0, 0])
+            totals[0] += seconds
+            totals[1] += count
+
+    def merge(self, stages: dict[str, list[float]]) -> None:
+        for stage, (seconds, count) in stages.items():
+            self.add(stage, seconds, int(count))
+
+    def report(self) -> dict[str, dict[str, float]]:
+        return {
+            stage: {
+                "total_s": seconds,
+                "count": count,
+                "per_second": count / seconds if seconds > 0 else 0.0,
+            }
+            for stage, (seconds, count) in self.stages.items()
+        }
+
+
 def count_with_diacritics(
     total_counter: Counter, with_diacritics_counter: Counter
 ) -> Callable[[str], Any]:
     def fn(text: str):
         total_counter.increment()
-        if remove_diacritics(text) != text:
+        if has_diacritics(text):
             with_diacritics_counter.increment()
 
     return fn
@@ -0,0 +1,163 @@
+from contextlib import contextmanager
+from dataclasses import asdict
+from pathlib import Path
+from threading import Lock
+from typing import IO, Any, Final, Iterator
+import json
+import os
+import sqlite3
+import tempfile
+import numpy as np
+from .cache import FileHashes
+
+
+WEIGHTS_FORMAT: Final[int] = 1
+ALIGNMENT: Final[int] = 64
+
+
+@contextmanager
+def _replacing(path: Path, mode: str) -> Iterator[IO[Any]]:
+    # a temporary name of its own per writer, processes converting the same
+    # checkpoint each write a whole copy and the last rename wins
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f"{path.name}.", suffix=".tmp")
+    try:
+        with open(fd, mode, encoding=None if "b" in mode else "utf-8") as file:
+            yield file
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+# openai-whisper models converted once from their pickled checkpoint into a
+# raw tensor blob (`<sha256>.bin`) and its header (`<sha256>.json`), keyed by
+# the checkpoint digest. Loading memory-maps the blob copy-on-write, so
+# neither the checkpoint is unpickled nor the weights are copied on cpu
+class WeightsCache:
+    def __init__(self, cache_dir: str | Path):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._lock = Lock()
+        self._file_hashes = FileHashes(
+            sqlite3.connect(
+                self.cache_dir / "hashes.sqlite3",
+                check_same_thread=False,
+                # --workers processes load the same checkpoint
+                timeout=60,
+            ),
+            self._lock,
+        )
+
+    def checkpoint_hash(self, path: str | Path) -> str:
+        # hashing a multi-GB checkpoint costs about as much as unpickling it
+        return self._file_hashes(path)
+
+    def _paths(self, sha256: str) -> tuple[Path, Path]:
+        return self.cache_dir / f"{sha256}.json", self.cache_dir / f"{sha256}.bin"
+
+    def __contains__(self, sha256: str) -> bool:
+        header_path, blob_path = self._paths(sha256)
+        return header_path.is_file() and blob_path.is_file()
+
+    def save(self, sha256: str, model: Any) -> None:
+        import torch
+
+        header_path, blob_path = self._paths(sha256)
+        tensors: dict[str, dict[str, Any]] = {}
+        persistent = set(model.state_dict().keys())
+
+        with _replacing(blob_path, "wb") as blob_file:
+            offset = 0
+            named = [(name, "parameter", t) for name, t in model.named_parameters()]
+            named += [(name, "buffer", t) for name, t in model.named_buffers()]
+            for name, kind, tensor in named:
+                tensor = tensor.detach()
+                sparse = tensor.is_sparse
+                if sparse:
+                    tensor = tensor.to_dense()
+                array = tensor.cpu().contiguous().numpy()
+
+                padding = -offset % ALIGNMENT
+                blob_file.write(b"\0" * padding)
+                offset += padding
+
+                tensors[name] = {
+                    "kind": kind,
+                    "dtype": str(array.dtype),
+                    "shape": list(array.shape),
+                    "offset": offset,
+                    "sparse": sparse,
+                    "persistent": name in persistent,
+                }
+                blob_file.write(array.tobytes())
+                offset += array.nbytes
+
+        # the header is written last, a blob without one is never read
+        with _replacing(header_path, "w") as file:
+            json.dump(
+                {
+                    "format": WEIGHTS_FORMAT,
+                    "torch": torch.__version__,
+                    "dims": asdict(model.dims),
+                    "tensors": tensors,
+                },
+                file,
+            )
+
+    def load(self, sha256: str, device: str) -> Any:
+        import torch
+        from whisper.model import ModelDimensions, Whisper  # type: ignore
+
+        header_path, blob_path = self._paths(sha256)
+        with open(header_path, "r", encoding="utf-8") as file:
+            header = json.load(file)
+        if header["format"] != WEIGHTS_FORMAT:
+            raise ValueError(f"{header_path}: unsupported weights format {header['format']}")
+
+        # built on the meta device, so no memory is allocated or randomly
+        # initialized for weights that are replaced right away
+        dims = ModelDimensions(**header["dims"])
+        try:
+            with torch.device("meta"):
+                model = Whisper(dims)
+        except (NotImplementedError, RuntimeError):
+            # a torch without meta kernels for everything Whisper.__init__ does
+            model = Whisper(dims)
+
+        # copy-on-write: writable tensors for torch, the file is never modified
+        blob = np.memmap(blob_path, dtype=np.uint8, mode="c")
+        for name, entry in header["tensors"].items():
+            dtype = np.dtype(entry["dtype"])
+            count = int(np.prod(entry["shape"], dtype=np.int64))
+            array = blob[entry["offset"] : entry["offset"] + count * dtype.itemsize]
+            tensor = torch.from_numpy(array.view(dtype).reshape(entry["shape"]))
+            if entry["sparse"]:
+                tensor = tensor.to_sparse()
+
+            module_name, _, attr = name.rpartition(".")
+            module = model.get_submodule(module_name)
+            if entry["kind"] == "parameter":
+                module._parameters[attr] = torch.nn.Parameter(tensor, requires_grad=False)
+            else:
+                module.register_buffer(attr, tensor, persistent=entry["persistent"])
+
+        return model.to(device)
+
+
+def load_whisper_checkpoint(
+    path: str | Path, device: str, cache_dir: str | Path | None
+) -> tuple[Any, str]:
+    # (model, where it was loaded from)
+    from whisper import load_model  # type: ignore
+
+    if cache_dir is None or not Path(path).is_file():
+        return load_model(str(path), device=device), "checkpoint"
+
+    cache = WeightsCache(cache_dir)
+    sha256 = cache.checkpoint_hash(path)
+    if sha256 in cache:
+        return cache.load(sha256, device), "weights cache"
+
+    model = load_model(str(path), device=device)
+    cache.save(sha256, model)
+    return model, "checkpoint (converted)"